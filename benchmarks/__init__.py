@@ -0,0 +1,3 @@
+"""
+Бенчмарки каталога и базы заказов
+"""
@@ -0,0 +1,384 @@
+"""
+Микробенчмарки каталога: функции data/tariffs.py и клавиатуры.
+
+Для каждого размера синтетического каталога (по умолчанию 10, 1k, 10k, 100k
+тарифов) замеряется время одного вызова каждой публичной функции каталога
+(и её асинхронной обёртки) и каждого построителя клавиатур. Не замеряются
+только настройка и служебные функции, которые не вызываются на запросах:
+configure_catalog, start/stop_catalog_watcher, catalog_actor и
+invalidate_catalog (она входит в «load_store (cold)»). Отчёт — JSON,
+удобный для сравнения между коммитами.
+
+Запуск: python -m benchmarks.catalog_bench [--sizes 10,1000] [--backend json] [--watch]
+                                           [--output report.json]
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import data.tariffs as catalog
+from keyboards import admin_kb, main_kb
+
+
+_DEFAULT_SIZES = (10, 1_000, 10_000, 100_000)
+_OPERATORS = 20
+_PAYMENT_METHODS = 5
+_TARGET_SECONDS = 0.2
+_MAX_ITERATIONS = 10_000
+_ROUNDS = 3
+
+
+def _synthetic_store(tariffs: int) -> dict:
+    operators = [{"id": i, "name": f"Оператор {i}"} for i in range(1, _OPERATORS + 1)]
+    rows = [
+        {
+            "id": i,
+            "operator_id": i % _OPERATORS + 1,
+            "name": f"Тариф {i}",
+            "description": f"Безлимитный интернет, {100 + i % 900} минут и {i % 50} ГБ",
+            "monthly_fee": 300 + i % 700 if i % 4 else None,
+            "connection_price": 1000 + i % 2000,
+            "is_public": i % 5 != 0,
+            "regions": [f"Регион {i % 10}"] if i % 3 == 0 else [],
+        }
+        for i in range(1, tariffs + 1)
+    ]
+    methods = [
+        {"id": i, "name": f"Банк {i}", "details": f"Карта 2200 0000 0000 {i:04d}", "is_active": i % 2 == 1}
+        for i in range(1, _PAYMENT_METHODS + 1)
+    ]
+    return {
+        "operators": operators,
+        "tariffs": rows,
+        "payment_methods": methods,
+        "next_operator_id": _OPERATORS + 1,
+        "next_tariff_id": tariffs + 1,
+        "next_payment_method_id": _PAYMENT_METHODS + 1,
+        "journal_seq": 0,
+    }
+
+
+def _use_catalog(workdir: Path, tariffs: int, backend: str, watch: bool) -> None:
+    catalog.stop_catalog_watcher()
+    for path in workdir.iterdir():
+        path.unlink()
+    catalog._STORE_PATH = workdir / "store.json"
+    catalog._STORE_PATH.write_bytes(catalog._serialize(_synthetic_store(tariffs)))
+    catalog.configure_catalog(backend, workdir / "catalog.db")
+    catalog.get_all_operators()
+    if watch:
+        catalog.start_catalog_watcher()
+
+
+def _cycle(values: list) -> Callable[[], object]:
+    """Функция, по кругу возвращающая значения списка"""
+    state = {"i": -1}
+
+    def next_value():
+        state["i"] = (state["i"] + 1) % len(values)
+        return values[state["i"]]
+
+    return next_value
+
+
+async def _time_call(
+    func: Callable[[], object],
+    setup: Optional[Callable[[int], None]] = None,
+) -> Tuple[float, int]:
+    """Лучшее из _ROUNDS время одного вызова (нс) и число вызовов в раунде.
+
+    setup(n) вызывается вне замера перед каждым раундом из n вызовов
+    (например, создаёт записи для удаления).
+    """
+    async def call():
+        result = func()
+        if inspect.isawaitable(result):
+            await result
+
+    if setup is not None:
+        setup(1)
+    started = time.perf_counter_ns()
+    await call()
+    estimate = max(time.perf_counter_ns() - started, 1)
+    iterations = int(min(max(_TARGET_SECONDS * 1e9 / estimate, 1), _MAX_ITERATIONS))
+
+    best = None
+    for _ in range(_ROUNDS):
+        if setup is not None:
+            setup(iterations)
+        started = time.perf_counter_ns()
+        for _ in range(iterations):
+            await call()
+        per_call = (time.perf_counter_ns() - started) / iterations
+        best = per_call if best is None else min(best, per_call)
+    return best, iterations
+
+
+def _cases(tariffs: int) -> List[tuple]:
+    """(название, вызов[, подготовка]) для каталога текущего размера"""
+    operator_id = _OPERATORS // 2
+    tariff_ids = list(range(1, tariffs + 1))
+    tariff_id = _cycle(tariff_ids)
+    operators = catalog.get_all_operators()
+    methods = catalog.get_all_payment_methods()
+    method_id = _cycle([method.id for method in methods])
+    sample = catalog.get_tariff_by_id(tariffs // 2 or 1)
+    method = methods[0]
+    operator_names = {operator.id: operator.name for operator in operators}
+    found = catalog.search_tariffs("безлимитный интернет")
+    page_tariffs, page, pages = catalog.get_tariffs_page(operator_id, 0, include_hidden=True)
+    price = _cycle([1000, 1100])
+    bulk_ids = tariff_ids[:100]
+    bulk_rows = _cycle([
+        [
+            {
+                "operator_id": catalog.get_tariff_by_id(i).operator_id,
+                "name": f"Тариф {i}",
+                "description": "обновлено",
+                "monthly_fee": None,
+                "connection_price": value,
+                "is_public": True,
+            }
+            for i in bulk_ids
+        ]
+        for value in (1000, 1100)
+    ])
+    # Все тарифы одного оператора (каталог / _OPERATORS штук) одним пакетом
+    operator_ids = [tariff.id for tariff in catalog.get_tariffs_by_operator(operator_id, True)]
+    operator_prices = _cycle([
+        {i: {"connection_price": value} for i in operator_ids}
+        for value in (1000, 1100)
+    ])
+    # Импорт файла из одних обновлений: все тарифы оператора, только цена
+    operator_rows = _cycle([
+        [
+            {"operator_id": operator_id, "name": tariff.name, "connection_price": value}
+            for tariff in catalog.get_tariffs_by_operator(operator_id, True)
+        ]
+        for value in (1000, 1100)
+    ])
+
+    # Записи, созданные бенчмарком; удаления работают только с ними
+    added_tariffs: List[int] = []
+    added_operators: List[int] = []
+    added_methods: List[int] = []
+
+    def add_tariff():
+        added_tariffs.append(
+            catalog.add_tariff(operator_id, "Новый тариф", "описание", 500, 1500, True).id
+        )
+
+    def add_operator():
+        added_operators.append(catalog.add_operator("Новый оператор").id)
+
+    def add_payment_method():
+        added_methods.append(catalog.add_payment_method("Новый банк", "реквизиты").id)
+
+    async def aadd_tariff():
+        added_tariffs.append(
+            (await catalog.aadd_tariff(operator_id, "Новый тариф", "описание", 500, 1500, True)).id
+        )
+
+    async def aadd_operator():
+        added_operators.append((await catalog.aadd_operator("Новый оператор")).id)
+
+    async def aadd_payment_method():
+        added_methods.append((await catalog.aadd_payment_method("Новый банк", "реквизиты")).id)
+
+    def ensure(added: list, create: Callable[[], None]) -> Callable[[int], None]:
+        def setup(count: int) -> None:
+            while len(added) < count:
+                create()
+        return setup
+
+    def cold_load():
+        catalog.invalidate_catalog()
+        catalog.get_all_operators()
+
+    return [
+        # Чтение
+        ("load_store (cold)", cold_load),
+        ("get_catalog_version", catalog.get_catalog_version),
+        ("get_all_operators", catalog.get_all_operators),
+        ("get_operator_by_id", lambda: catalog.get_operator_by_id(operator_id)),
+        ("get_tariffs_by_operator", lambda: catalog.get_tariffs_by_operator(operator_id)),
+        ("get_tariffs_by_operator (hidden)", lambda: catalog.get_tariffs_by_operator(operator_id, True)),
+        ("get_tariffs_page", lambda: catalog.get_tariffs_page(operator_id, 1)),
+        ("get_tariffs_page (region)", lambda: catalog.get_tariffs_page(operator_id, 1, region="Регион 3")),
+        ("get_regions", catalog.get_regions),
+        ("find_region", lambda: catalog.find_region("г. Регион 3, ул. Ленина, 1")),
+        ("region_key", lambda: catalog.region_key("  Регион  Ёлкино ")),
+        ("clean_regions", lambda: catalog.clean_regions(["Регион 1", " регион 1", "", "Регион 2"])),
+        ("get_tariff_by_id", lambda: catalog.get_tariff_by_id(tariff_id())),
+        ("format_tariff_info", lambda: catalog.format_tariff_info(sample, "Оператор")),
+        ("format_tariff_admin_info", lambda: catalog.format_tariff_admin_info(sample, "Оператор")),
+        ("render_tariff", lambda: catalog.render_tariff(sample.id)),
+        ("render_tariff (admin)", lambda: catalog.render_tariff(sample.id, admin=True)),
+        ("get_all_payment_methods", catalog.get_all_payment_methods),
+        ("get_active_payment_methods", catalog.get_active_payment_methods),
+        ("get_payment_method_by_id", lambda: catalog.get_payment_method_by_id(method_id())),
+        ("search_tariffs", lambda: catalog.search_tariffs("безлимитный интернет")),
+        ("search_tariffs (prefix)", lambda: catalog.search_tariffs("тариф 12")),
+        ("search_tariffs (prefix, every word)", lambda: catalog.search_tariffs("безлимит 100")),
+        ("recommend_tariffs", lambda: catalog.recommend_tariffs(500, 1500)),
+        # Асинхронные обёртки: чтение
+        ("aget_catalog_version", catalog.aget_catalog_version),
+        ("aget_all_operators", catalog.aget_all_operators),
+        ("aget_operator_by_id", lambda: catalog.aget_operator_by_id(operator_id)),
+        ("aget_tariffs_by_operator", lambda: catalog.aget_tariffs_by_operator(operator_id)),
+        ("aget_tariffs_page", lambda: catalog.aget_tariffs_page(operator_id, 1)),
+        ("aget_tariff_by_id", lambda: catalog.aget_tariff_by_id(tariff_id())),
+        ("aget_regions", catalog.aget_regions),
+        ("afind_region", lambda: catalog.afind_region("г. Регион 3, ул. Ленина, 1")),
+        ("arender_tariff", lambda: catalog.arender_tariff(sample.id)),
+        ("asearch_tariffs", lambda: catalog.asearch_tariffs("безлимитный интернет")),
+        ("arecommend_tariffs", lambda: catalog.arecommend_tariffs(500, 1500)),
+        ("aget_all_payment_methods", catalog.aget_all_payment_methods),
+        ("aget_active_payment_methods", catalog.aget_active_payment_methods),
+        ("aget_payment_method_by_id", lambda: catalog.aget_payment_method_by_id(method_id())),
+        # Запись
+        ("add_tariff", add_tariff),
+        ("update_tariff", lambda: catalog.update_tariff(sample.id, connection_price=price())),
+        ("toggle_tariff_visibility", lambda: catalog.toggle_tariff_visibility(sample.id)),
+        ("delete_tariff", lambda: catalog.delete_tariff(added_tariffs.pop()),
+         ensure(added_tariffs, add_tariff)),
+        ("bulk_upsert_tariffs (100)", lambda: catalog.bulk_upsert_tariffs(bulk_rows())),
+        ("bulk_upsert_tariffs (operator updates)", lambda: catalog.bulk_upsert_tariffs(operator_rows())),
+        ("bulk_update_tariffs (100)", lambda: catalog.bulk_update_tariffs(
+            {i: {"connection_price": price()} for i in bulk_ids}
+        )),
+        ("bulk_update_tariffs (operator)", lambda: catalog.bulk_update_tariffs(operator_prices())),
+        ("add_operator", add_operator),
+        ("delete_operator", lambda: catalog.delete_operator(added_operators.pop()),
+         ensure(added_operators, add_operator)),
+        ("add_payment_method", add_payment_method),
+        ("update_payment_method", lambda: catalog.update_payment_method(method_id(), details="новые реквизиты")),
+        ("toggle_payment_method", lambda: catalog.toggle_payment_method(method_id())),
+        ("delete_payment_method", lambda: catalog.delete_payment_method(added_methods.pop()),
+         ensure(added_methods, add_payment_method)),
+        # Асинхронные обёртки: запись (через поток записи)
+        ("aadd_tariff", aadd_tariff),
+        ("aupdate_tariff", lambda: catalog.aupdate_tariff(sample.id, connection_price=price())),
+        ("atoggle_tariff_visibility", lambda: catalog.atoggle_tariff_visibility(sample.id)),
+        ("adelete_tariff", lambda: catalog.adelete_tariff(added_tariffs.pop()),
+         ensure(added_tariffs, add_tariff)),
+        ("abulk_upsert_tariffs (100)", lambda: catalog.abulk_upsert_tariffs(bulk_rows())),
+        ("abulk_update_tariffs (100)", lambda: catalog.abulk_update_tariffs(
+            {i: {"connection_price": price()} for i in bulk_ids}
+        )),
+        ("aadd_operator", aadd_operator),
+        ("adelete_operator", lambda: catalog.adelete_operator(added_operators.pop()),
+         ensure(added_operators, add_operator)),
+        ("aadd_payment_method", aadd_payment_method),
+        ("aupdate_payment_method", lambda: catalog.aupdate_payment_method(method_id(), details="новые реквизиты")),
+        ("atoggle_payment_method", lambda: catalog.atoggle_payment_method(method_id())),
+        ("adelete_payment_method", lambda: catalog.adelete_payment_method(added_methods.pop()),
+         ensure(added_methods, add_payment_method)),
+        ("flush", catalog.flush),
+        # Клавиатуры
+        ("main_menu_kb", main_kb.main_menu_kb),
+        ("operators_kb", main_kb.operators_kb),
+        ("operators_kb (build)", main_kb._build_operators_kb),
+        ("tariffs_kb", lambda: main_kb.tariffs_kb(operator_id, 1)),
+        ("tariffs_kb (region)", lambda: main_kb.tariffs_kb(operator_id, 1, "Регион 3")),
+        ("tariffs_kb (build)", lambda: main_kb._build_tariffs_kb(operator_id, 1)),
+        ("regions_kb", main_kb.regions_kb),
+        ("regions_kb (build)", lambda: main_kb._build_regions_kb(0)),
+        ("region_callback_key", lambda: main_kb.region_callback_key("Регион 3")),
+        ("page_nav_buttons", lambda: main_kb.page_nav_buttons(f"operator:{operator_id}", page, pages)),
+        ("search_results_kb", lambda: main_kb.search_results_kb(found, operator_names)),
+        ("tariff_action_kb", lambda: main_kb.tariff_action_kb(sample.id, sample.operator_id)),
+        ("tariff_link_kb", lambda: main_kb.tariff_link_kb(f"https://t.me/bench_bot?start=tariff_{sample.id}")),
+        ("order_mode_kb", lambda: main_kb.order_mode_kb(sample.id)),
+        ("confirm_order_kb", lambda: main_kb.confirm_order_kb(sample.id)),
+        ("payment_methods_kb", lambda: main_kb.payment_methods_kb(methods, sample.id)),
+        ("payment_details_kb", lambda: main_kb.payment_details_kb(1)),
+        ("payment_link_kb", lambda: main_kb.payment_link_kb("https://pay.example.com/order/1")),
+        ("admin_confirm_payment_kb", lambda: main_kb.admin_confirm_payment_kb(1, 1)),
+        ("back_to_operators_kb", main_kb.back_to_operators_kb),
+        ("back_to_main_kb", main_kb.back_to_main_kb),
+        ("cancel_kb", main_kb.cancel_kb),
+        ("admin_main_kb", admin_kb.admin_main_kb),
+        ("admin_operators_kb", lambda: admin_kb.admin_operators_kb(operators)),
+        ("admin_operator_actions_kb", lambda: admin_kb.admin_operator_actions_kb(operator_id)),
+        ("admin_tariffs_operators_kb", lambda: admin_kb.admin_tariffs_operators_kb(operators)),
+        ("admin_tariffs_kb", lambda: admin_kb.admin_tariffs_kb(operator_id, page_tariffs, page, pages)),
+        ("admin_tariff_actions_kb", lambda: admin_kb.admin_tariff_actions_kb(
+            sample.id, sample.operator_id, sample.is_public
+        )),
+        ("admin_tariff_edit_kb", lambda: admin_kb.admin_tariff_edit_kb(sample.id)),
+        ("admin_tariff_visibility_kb", admin_kb.admin_tariff_visibility_kb),
+        ("admin_price_rule_confirm_kb", lambda: admin_kb.admin_price_rule_confirm_kb(operator_id)),
+        ("admin_catalog_io_kb", admin_kb.admin_catalog_io_kb),
+        ("admin_payment_methods_kb", lambda: admin_kb.admin_payment_methods_kb(methods)),
+        ("admin_payment_method_actions_kb", lambda: admin_kb.admin_payment_method_actions_kb(
+            method.id, method.is_active
+        )),
+        ("admin_payment_method_edit_kb", lambda: admin_kb.admin_payment_method_edit_kb(method.id)),
+    ]
+
+
+async def run(sizes: List[int], backend: str, watch: bool = False) -> dict:
+    results = []
+    workdir = Path(tempfile.mkdtemp(prefix="catalog-bench-"))
+    try:
+        for size in sizes:
+            _use_catalog(workdir, size, backend, watch)
+            for name, func, *setup in _cases(size):
+                ns_per_call, iterations = await _time_call(func, *setup)
+                results.append({
+                    "tariffs": size,
+                    "name": name,
+                    "ns_per_call": round(ns_per_call),
+                    "iterations": iterations,
+                })
+                print(f"{size:>7} {name:<36} {ns_per_call / 1000:>12.1f} us", file=sys.stderr)
+            catalog.flush()
+    finally:
+        catalog.stop_catalog_watcher()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": backend,
+        "watch": watch,
+        "orjson": catalog.orjson is not None,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in _DEFAULT_SIZES),
+        help="размеры каталога через запятую",
+    )
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    parser.add_argument("--watch", action="store_true", help="с запущенным наблюдателем каталога")
+    parser.add_argument("--output", help="файл для JSON-отчёта (по умолчанию stdout)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    report = asyncio.run(run(sizes, args.backend, args.watch))
+
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
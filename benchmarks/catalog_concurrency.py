@@ -0,0 +1,103 @@
+"""
+Несколько процессов одновременно меняют один каталог.
+
+Каждый процесс добавляет тарифы и переключает видимость общего тарифа.
+В конце проверяется, что ни одно изменение не потеряно и ID не повторились.
+
+Запуск: python -m benchmarks.catalog_concurrency [--processes 4] [--ops 200] [--backend json]
+"""
+import argparse
+import multiprocessing
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import data.tariffs as catalog
+
+
+_SOURCE_STORE = Path(__file__).resolve().parent.parent / "data" / "store.json"
+
+
+def _configure(workdir: Path, backend: str) -> None:
+    catalog._STORE_PATH = workdir / "store.json"
+    catalog.configure_catalog(backend, workdir / "catalog.db")
+
+
+def _worker(workdir: str, backend: str, worker_id: int, ops: int, shared_tariff_id: int) -> None:
+    _configure(Path(workdir), backend)
+    operator_id = catalog.get_all_operators()[0].id
+    for i in range(ops):
+        catalog.add_tariff(operator_id, f"stress {worker_id}-{i}", "", None, i, True)
+        catalog.toggle_tariff_visibility(shared_tariff_id)
+    catalog.flush()
+
+
+def run(processes: int, ops: int, backend: str) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="catalog-stress-"))
+    try:
+        shutil.copy(_SOURCE_STORE, workdir / "store.json")
+        _configure(workdir, backend)
+        operator_id = catalog.get_all_operators()[0].id
+        shared = catalog.add_tariff(operator_id, "stress shared", "", None, 0, True)
+        tariffs_before = len(catalog.get_tariffs_by_operator(operator_id, include_hidden=True))
+        catalog.flush()
+
+        ctx = multiprocessing.get_context("spawn")
+        workers = [
+            ctx.Process(target=_worker, args=(str(workdir), backend, n, ops, shared.id))
+            for n in range(processes)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        catalog.invalidate_catalog()
+        tariffs = catalog.get_tariffs_by_operator(operator_id, include_hidden=True)
+        ids = [tariff.id for tariff in tariffs]
+        expected = tariffs_before + processes * ops
+        # Общий тариф переключён processes * ops раз
+        expected_public = (processes * ops) % 2 == 0
+
+        return {
+            "backend": backend,
+            "processes": processes,
+            "writes": processes * ops * 2,
+            "seconds": round(elapsed, 3),
+            "writes_per_second": round(processes * ops * 2 / elapsed),
+            "tariffs_expected": expected,
+            "tariffs_found": len(tariffs),
+            "duplicate_ids": len(ids) - len(set(ids)),
+            "lost_toggles": catalog.get_tariff_by_id(shared.id).is_public != expected_public,
+            "failed_workers": sum(1 for worker in workers if worker.exitcode != 0),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--backend", choices=("json", "sqlite"), default="json")
+    args = parser.parse_args()
+
+    result = run(args.processes, args.ops, args.backend)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+    ok = (
+        result["tariffs_found"] == result["tariffs_expected"]
+        and not result["duplicate_ids"]
+        and not result["lost_toggles"]
+        and not result["failed_workers"]
+    )
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Память на тариф: словари + dataclass на каждый вызов против общих записей.
+
+Запуск: python -m benchmarks.catalog_memory [--tariffs 10000]
+"""
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from data.tariffs import Tariff
+
+
+@dataclass
+class _LegacyTariff:
+    """Прежняя модель тарифа: изменяемый dataclass с __dict__"""
+    id: int
+    operator_id: int
+    name: str
+    description: str
+    monthly_fee: Optional[int]
+    connection_price: int
+    is_public: bool
+
+
+def _rows(count: int) -> list:
+    return [
+        {
+            "id": i,
+            "operator_id": i % 50 + 1,
+            "name": f"Тариф {i}",
+            "description": f"Описание тарифа {i}",
+            "monthly_fee": 300 + i % 700,
+            "connection_price": 1000 + i % 2000,
+            "is_public": i % 3 != 0,
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def _measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del keep
+    return after - before
+
+
+def run(count: int) -> dict:
+    # Строки создаются заранее: строки названий/описаний общие в обоих вариантах
+    rows = _rows(count)
+
+    # Было: снимок хранит словари, каждый читатель строит свой dataclass
+    legacy_rows = _measure(lambda: [dict(row) for row in rows])
+    legacy_objects = _measure(lambda: [_LegacyTariff(**row) for row in rows])
+    # Стало: одна неизменяемая запись со __slots__ на тариф
+    records = _measure(lambda: [Tariff(**row) for row in rows])
+
+    return {
+        "tariffs": count,
+        "before_bytes_per_tariff": round((legacy_rows + legacy_objects) / count, 1),
+        "before_snapshot_bytes_per_tariff": round(legacy_rows / count, 1),
+        "before_per_lookup_bytes_per_tariff": round(legacy_objects / count, 1),
+        "after_bytes_per_tariff": round(records / count, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tariffs", type=int, default=10_000)
+    args = parser.parse_args()
+
+    for key, value in run(args.tariffs).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Пропускная способность базы заказов и задержка записи заказа.
+
+Каждый «покупатель» проходит путь оплаты: create_order, get_order_by_id,
+update_order_receipt, get_order_by_id, confirm_order_payment,
+get_orders_by_user. Покупатели работают параллельно. Сценарии:
+    connect_per_call — без пула (соединение на каждый запрос);
+    pool_rollback    — пул, журнал отката и synchronous=FULL (умолчания SQLite);
+    pool_no_batching — пул с PRAGMA из настроек, коммит на каждое изменение;
+    pool             — то же с group commit (пачки до --batch-size изменений).
+Для каждого сценария замеряется и задержка одиночного create_order.
+
+Запуск: python -m benchmarks.orders_db [--flows 300] [--concurrency 20] [--readers 3]
+        [--batch-size 64] [--batch-delay-ms 0]
+"""
+import argparse
+import asyncio
+import shutil
+import statistics
+import tempfile
+import time
+from itertools import count
+from pathlib import Path
+
+import database
+from config import DatabaseConfig
+
+
+_OPS_PER_FLOW = 6
+_LATENCY_SAMPLES = 200
+_ROLLBACK_PRAGMAS = {"journal_mode": "delete", "synchronous": "full"}
+
+
+async def _create(order_id: int) -> None:
+    await database.create_order(
+        order_id=order_id,
+        user_id=1000 + order_id % 50,
+        username="bench",
+        tariff_id=1,
+        tariff_name="Тариф",
+        operator_id=1,
+        operator_name="Оператор",
+        monthly_fee=500,
+        connection_price=1500,
+        mode="new",
+        transfer_phone=None,
+        full_name="Иван Иванов",
+        region_city="Москва",
+        passport_photo_1="photo-1",
+        passport_photo_2="photo-2",
+    )
+
+
+async def _flow(order_id: int) -> None:
+    await _create(order_id)
+    await database.get_order_by_id(order_id)
+    await database.update_order_receipt(order_id, "receipt", "Банк")
+    await database.get_order_by_id(order_id)
+    await database.confirm_order_payment(order_id)
+    await database.get_orders_by_user(1000 + order_id % 50)
+
+
+async def _run_flows(flows: int, concurrency: int, order_ids) -> float:
+    queue = list(range(flows))
+
+    async def customer():
+        while queue:
+            queue.pop()
+            await _flow(next(order_ids))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(customer() for _ in range(concurrency)))
+    return time.perf_counter() - started
+
+
+async def _create_latency(order_ids) -> dict:
+    """Задержка create_order (мс) при последовательных вызовах"""
+    samples = []
+    for _ in range(_LATENCY_SAMPLES):
+        started = time.perf_counter()
+        await _create(next(order_ids))
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "mean": round(statistics.fmean(samples), 3),
+        "p95": round(samples[int(len(samples) * 0.95)], 3),
+    }
+
+
+async def _scenario(workdir: Path, name: str, flows: int, concurrency: int, pool) -> dict:
+    # Режим журнала хранится в файле базы — у каждого сценария своя база
+    database.DB_PATH = workdir / f"{name}.db"
+    order_ids = count(1)
+    await database.init_db(**(pool or {}))
+    if pool is None:
+        # Без пула: init_db только создаёт таблицы
+        await database.close_db()
+    try:
+        await _run_flows(min(flows, 20), concurrency, order_ids)  # прогрев
+        elapsed = await _run_flows(flows, concurrency, order_ids)
+        latency = await _create_latency(order_ids)
+    finally:
+        await database.close_db()
+    return {
+        "ops_per_second": round(flows * _OPS_PER_FLOW / elapsed),
+        "create_order_ms_mean": latency["mean"],
+        "create_order_ms_p95": latency["p95"],
+    }
+
+
+async def run(
+    flows: int,
+    concurrency: int,
+    readers: int,
+    batch_size: int = 64,
+    batch_delay_ms: float = 0,
+) -> dict:
+    workdir = Path(tempfile.mkdtemp(prefix="orders-bench-"))
+    original_path = database.DB_PATH
+    pragmas = DatabaseConfig().pragmas
+    scenarios = {
+        "connect_per_call": None,
+        "pool_rollback": {"readers": readers, "pragmas": _ROLLBACK_PRAGMAS, "batch_size": 1},
+        "pool_no_batching": {"readers": readers, "pragmas": pragmas, "batch_size": 1},
+        "pool": {
+            "readers": readers,
+            "pragmas": pragmas,
+            "batch_size": batch_size,
+            "batch_delay": batch_delay_ms / 1000,
+        },
+    }
+    result = {
+        "flows": flows,
+        "concurrency": concurrency,
+        "readers": readers,
+        "batch_size": batch_size,
+        "batch_delay_ms": batch_delay_ms,
+    }
+    try:
+        for name, pool in scenarios.items():
+            measured = await _scenario(workdir, name, flows, concurrency, pool)
+            for key, value in measured.items():
+                result[f"{name}_{key}"] = value
+    finally:
+        database.DB_PATH = original_path
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--flows", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--readers", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--batch-delay-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(
+        args.flows, args.concurrency, args.readers, args.batch_size, args.batch_delay_ms
+    ))
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
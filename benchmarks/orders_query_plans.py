@@ -0,0 +1,104 @@
+"""
+Проверка планов запросов к базе заказов (EXPLAIN QUERY PLAN).
+
+Создаёт базу через init_db(), заполняет её заказами и убеждается, что
+выборки database.py идут по своим индексам и без отдельной сортировки.
+Печатает планы и время запросов; код возврата 1, если план не тот.
+
+Запуск: python -m benchmarks.orders_query_plans [--orders 200000]
+"""
+import argparse
+import asyncio
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import database
+
+
+_STATUSES = ("pending", "paid", "payment_rejected", "awaiting_confirmation")
+
+# (название, SQL, параметры, индекс, который должен использоваться)
+_CHECKS = (
+    ("get_orders_by_user", database._ORDERS_BY_USER_SQL, (1042,), "idx_orders_user_created"),
+    ("get_all_orders", database._RECENT_ORDERS_SQL, (100,), "idx_orders_created"),
+    (
+        "get_orders_awaiting_confirmation",
+        database._AWAITING_CONFIRMATION_SQL,
+        (100,),
+        "idx_orders_awaiting_confirmation",
+    ),
+)
+
+
+async def _create_schema() -> None:
+    await database.init_db()
+    await database.close_db()
+
+
+def _fill(path: Path, orders: int) -> None:
+    conn = sqlite3.connect(str(path))
+    conn.executemany(
+        """
+        INSERT INTO orders (
+            order_id, user_id, username, tariff_id, tariff_name,
+            operator_id, operator_name, monthly_fee, connection_price,
+            mode, transfer_phone, full_name, region_city,
+            passport_photo_1, passport_photo_2, status, created_at
+        ) VALUES (?, ?, 'user', 1, 'Тариф', 1, 'Оператор', 500, 1500, 'new', NULL,
+                  'Иван Иванов', 'Москва', 'photo-1', 'photo-2', ?,
+                  datetime('2024-01-01', '+' || ? || ' seconds'))
+        """,
+        (
+            (i, 1000 + i % 5000, _STATUSES[i % 97 % len(_STATUSES)], i * 37 % orders)
+            for i in range(1, orders + 1)
+        ),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def check(path: Path) -> bool:
+    conn = sqlite3.connect(str(path))
+    ok = True
+    for name, sql, params, index in _CHECKS:
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        started = time.perf_counter()
+        rows = conn.execute(sql, params).fetchall()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        uses_index = any(index in detail for detail in plan)
+        sorts = any("TEMP B-TREE" in detail for detail in plan)
+        passed = uses_index and not sorts
+        ok = ok and passed
+        print(f"{'OK  ' if passed else 'FAIL'} {name}: {len(rows)} rows, {elapsed:.2f} ms")
+        for detail in plan:
+            print(f"       {detail}")
+    conn.close()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=200_000)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="orders-plans-"))
+    original_path = database.DB_PATH
+    database.DB_PATH = workdir / "orders.db"
+    try:
+        asyncio.run(_create_schema())
+        _fill(database.DB_PATH, args.orders)
+        ok = check(database.DB_PATH)
+    finally:
+        database.DB_PATH = original_path
+        shutil.rmtree(workdir, ignore_errors=True)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
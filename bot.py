@@ -11,7 +11,13 @@ from aiogram.enums import ParseMode
 
 from config import load_config
 from handlers import setup_routers
-from database import init_db
+from database import close_db, init_db
+from data.tariffs import (
+    configure_catalog,
+    flush as flush_catalog,
+    start_catalog_watcher,
+    stop_catalog_watcher,
+)
 from webhook_server import start_webhook_server
 
 
@@ -28,8 +34,24 @@ async def main():
     # Загрузка конфигурации
     config = load_config()
     
+    # Выбор хранилища каталога (store.json или SQLite)
+    configure_catalog(
+        config.catalog.backend,
+        config.catalog.sqlite_path,
+        page_size=config.catalog.page_size,
+    )
+    logger.info(f"🗂️ Каталог тарифов: {config.catalog.backend}")
+    if config.catalog.watch:
+        watch_mode = start_catalog_watcher()
+        logger.info(f"👀 Изменения каталога отслеживаются: {watch_mode}")
+    
     # Инициализация базы данных
-    await init_db()
+    await init_db(
+        readers=config.database.readers,
+        pragmas=config.database.pragmas,
+        batch_size=config.database.batch_size,
+        batch_delay=config.database.batch_delay_ms / 1000,
+    )
     logger.info("📦 База данных инициализирована")
     
     # Инициализация бота
@@ -65,6 +87,10 @@ async def main():
     finally:
         await webhook_runner.cleanup()
         await bot.session.close()
+        await close_db()
+        # Сбрасываем на диск отложенные изменения каталога
+        stop_catalog_watcher()
+        flush_catalog()
 
 
 if __name__ == "__main__":
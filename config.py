@@ -4,7 +4,7 @@
 """
 import os
 from dataclasses import dataclass, field
-from typing import List
+from typing import Dict, List
 from dotenv import load_dotenv
 
 # Загрузка переменных окружения из .env
@@ -39,12 +39,50 @@ class WebhookConfig:
     port: int
 
 
+@dataclass
+class CatalogConfig:
+    """Настройки хранилища каталога тарифов"""
+    backend: str = "json"  # "json" (data/store.json) или "sqlite"
+    sqlite_path: str = "data/catalog.db"
+    page_size: int = 10  # Тарифов на странице клавиатуры
+    watch: bool = True  # Подхватывать изменения каталога из других процессов
+
+
+@dataclass
+class DatabaseConfig:
+    """Настройки базы заказов"""
+    readers: int = 3  # Соединений для чтения в пуле (запись — одно соединение)
+    # PRAGMA для каждого соединения пула
+    journal_mode: str = "wal"  # wal: читатели не ждут писателя
+    synchronous: str = "normal"  # в WAL fsync только при checkpoint
+    cache_size: int = -16000  # < 0 — в КиБ (16 МБ), > 0 — в страницах
+    mmap_size: int = 64 * 1024 * 1024
+    busy_timeout: int = 5000  # мс ожидания блокировки
+    temp_store: str = "memory"
+    # Group commit: изменения из очереди фиксируются пачками
+    batch_size: int = 64  # изменений в одной транзакции максимум
+    batch_delay_ms: float = 0  # ожидание попутных изменений перед фиксацией
+
+    @property
+    def pragmas(self) -> Dict[str, object]:
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size": self.cache_size,
+            "mmap_size": self.mmap_size,
+            "busy_timeout": self.busy_timeout,
+            "temp_store": self.temp_store,
+        }
+
+
 @dataclass
 class Config:
     """Главная конфигурация"""
     bot: BotConfig
     robokassa: RobokassaConfig
     webhook: WebhookConfig
+    catalog: CatalogConfig
+    database: DatabaseConfig
 
 
 def _parse_admin_ids(value: str) -> List[int]:
@@ -84,4 +122,21 @@ def load_config() -> Config:
             host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
             port=int(os.getenv("WEBHOOK_PORT", "8080")),
         ),
+        catalog=CatalogConfig(
+            backend=os.getenv("CATALOG_BACKEND", "json").lower(),
+            sqlite_path=os.getenv("CATALOG_DB_PATH", "data/catalog.db"),
+            page_size=int(os.getenv("CATALOG_PAGE_SIZE", "10")),
+            watch=os.getenv("CATALOG_WATCH", "true").lower() == "true",
+        ),
+        database=DatabaseConfig(
+            readers=int(os.getenv("DB_READERS", "3")),
+            journal_mode=os.getenv("DB_JOURNAL_MODE", "wal").lower(),
+            synchronous=os.getenv("DB_SYNCHRONOUS", "normal").lower(),
+            cache_size=int(os.getenv("DB_CACHE_SIZE", "-16000")),
+            mmap_size=int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024))),
+            busy_timeout=int(os.getenv("DB_BUSY_TIMEOUT", "5000")),
+            temp_store=os.getenv("DB_TEMP_STORE", "memory").lower(),
+            batch_size=int(os.getenv("DB_BATCH_SIZE", "64")),
+            batch_delay_ms=float(os.getenv("DB_BATCH_DELAY_MS", "0")),
+        ),
     )
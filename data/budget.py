@@ -0,0 +1,72 @@
+"""
+Подбор тарифов по бюджету.
+
+Для оператора хранятся два отсортированных массива публичных тарифов:
+по абонплате и по стоимости подключения. Граница бюджета по каждой цене
+находится бинарным поиском, а перебирается только нужный конец массива,
+поэтому запрос не просматривает весь каталог.
+"""
+from bisect import bisect_right
+from typing import Iterable, List, Optional
+
+
+def monthly_fee_value(tariff) -> int:
+    """Абонплата для сравнения (не указана — 0)"""
+    return tariff.monthly_fee or 0
+
+
+def budget_rank(tariff) -> tuple:
+    """Ключ «лучше»: больше абонплата в пределах бюджета, дешевле подключение"""
+    return monthly_fee_value(tariff), -tariff.connection_price, -tariff.id
+
+
+class TariffPriceIndex:
+    """Отсортированные цены тарифов одного оператора"""
+
+    def __init__(self, tariffs: Iterable) -> None:
+        self._by_fee = sorted(tariffs, key=budget_rank)
+        self._fees = [monthly_fee_value(tariff) for tariff in self._by_fee]
+        self._by_connection = sorted(
+            self._by_fee, key=lambda tariff: (tariff.connection_price, -monthly_fee_value(tariff))
+        )
+        self._connections = [tariff.connection_price for tariff in self._by_connection]
+
+    def __len__(self) -> int:
+        return len(self._by_fee)
+
+    def within(
+        self,
+        max_monthly_fee: Optional[int],
+        max_connection_price: Optional[int],
+        limit: int,
+    ) -> List:
+        """До limit лучших тарифов, укладывающихся в обе границы"""
+        fee_end = len(self._fees) if max_monthly_fee is None else bisect_right(self._fees, max_monthly_fee)
+        connection_end = (
+            len(self._connections) if max_connection_price is None
+            else bisect_right(self._connections, max_connection_price)
+        )
+        if not fee_end or not connection_end:
+            return []
+
+        # Идём от самой дорогой подходящей абонплаты вниз, пока это дешевле,
+        # чем проверить все тарифы с подходящим подключением
+        connection_limit = self._connections[connection_end - 1]
+        found = []
+        stop = max(fee_end - connection_end, 0) - 1
+        for position in range(fee_end - 1, stop, -1):
+            tariff = self._by_fee[position]
+            if tariff.connection_price <= connection_limit:
+                found.append(tariff)
+                if len(found) == limit:
+                    return found
+        if stop < 0:
+            return found
+
+        fee_limit = self._fees[fee_end - 1]
+        found = [
+            tariff for tariff in self._by_connection[:connection_end]
+            if monthly_fee_value(tariff) <= fee_limit
+        ]
+        found.sort(key=budget_rank, reverse=True)
+        return found[:limit]
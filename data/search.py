@@ -0,0 +1,199 @@
+"""
+Полнотекстовый поиск по тарифам.
+
+Обратный индекс: основа слова -> {ID тарифа: вес}. Слова приводятся к нижнему
+регистру (ё -> е) и обрезаются по частым окончаниям русского языка, так что
+«безлимитный», «безлимитные» и «безлимитного» дают одну основу. Каждое
+слово запроса ищется и как префикс: «безлимит» находит «Безлимитный»,
+а результаты появляются по мере набора. Числа, кроме последнего слова,
+ищутся точно, чтобы «500» не находило «5000». Цены тарифа тоже индексируются,
+поэтому «безлимит 500» находит «Безлимитный 500» и тарифы с абонплатой или
+подключением за 500 ₽.
+"""
+import heapq
+import math
+import re
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional
+
+_WORD_RE = re.compile(r"[0-9a-zа-яё]+")
+
+# Окончания от длинных к коротким; снимаем первое подходящее
+_ENDINGS = sorted(
+    {
+        "иями", "ями", "ами", "ого", "его", "ому", "ему", "ыми", "ими", "ую", "юю",
+        "ая", "яя", "ое", "ее", "ые", "ие", "ый", "ий", "ой", "ей", "ом", "ем",
+        "ам", "ям", "ах", "ях", "ов", "ев", "ия", "ию", "ья", "ью", "ть", "ся",
+        "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+    },
+    key=len,
+    reverse=True,
+)
+_MIN_STEM = 3
+
+_STOP_WORDS = {"и", "в", "во", "на", "с", "со", "по", "для", "от", "до", "за", "к", "у", "о", "а", "не"}
+
+_NAME_WEIGHT = 3
+_PRICE_WEIGHT = 1
+_MAX_DESCRIPTION_WEIGHT = 2
+_MAX_PREFIX_TERMS = 50
+
+
+def stem(word: str) -> str:
+    """Основа слова: нижний регистр, ё -> е, без частого окончания"""
+    word = word.lower().replace("ё", "е")
+    if word.isdigit():
+        return word
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Основы слов текста без стоп-слов"""
+    return [
+        stem(word)
+        for word in _WORD_RE.findall(text.lower())
+        if word not in _STOP_WORDS
+    ]
+
+
+def _term_weights(tariff) -> Dict[str, int]:
+    weights: Dict[str, int] = {}
+    for term in tokenize(tariff.description):
+        weights[term] = min(weights.get(term, 0) + 1, _MAX_DESCRIPTION_WEIGHT)
+    for term in set(tokenize(tariff.name)):
+        weights[term] = weights.get(term, 0) + _NAME_WEIGHT
+    for price in (tariff.monthly_fee, tariff.connection_price):
+        if price:
+            term = str(price)
+            weights[term] = max(weights.get(term, 0), _PRICE_WEIGHT)
+    return weights
+
+
+class TariffSearchIndex:
+    """Обратный индекс по названиям, описаниям и ценам тарифов"""
+
+    def __init__(self, tariffs: Iterable = ()) -> None:
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._terms: Dict[int, tuple] = {}
+        self._sorted_terms: Optional[List[str]] = None
+        for tariff in tariffs:
+            self.add(tariff)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, tariff) -> None:
+        """Проиндексировать тариф (повторный вызов заменяет старые данные)"""
+        self.remove(tariff.id)
+        weights = _term_weights(tariff)
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._sorted_terms = None
+            postings[tariff.id] = weight
+        self._terms[tariff.id] = tuple(weights)
+
+    def remove(self, tariff_id: int) -> None:
+        """Убрать тариф из индекса"""
+        for term in self._terms.pop(tariff_id, ()):
+            postings = self._postings[term]
+            postings.pop(tariff_id, None)
+            if not postings:
+                del self._postings[term]
+                self._sorted_terms = None
+
+    def _prefix_terms(self, prefix: str) -> List[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        start = bisect_left(terms, prefix)
+        found = []
+        for term in terms[start:start + _MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            found.append(term)
+        return found
+
+    def _merged_postings(self, terms: Iterable[str]) -> Dict[int, int]:
+        """Объединение списков; вес тарифа — наибольший из слов"""
+        lists = [self._postings[term] for term in terms]
+        if len(lists) == 1:
+            return lists[0]
+        merged: Dict[int, int] = {}
+        for postings in lists:
+            for tariff_id, weight in postings.items():
+                if weight > merged.get(tariff_id, 0):
+                    merged[tariff_id] = weight
+        return merged
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        accept: Optional[Callable[[int], bool]] = None,
+        offset: int = 0,
+    ) -> List[int]:
+        """ID тарифов по убыванию релевантности (limit штук после offset).
+
+        Сначала ищутся тарифы со всеми словами запроса; если таких нет —
+        с любым из них. accept отсеивает неподходящие ID (например, скрытые).
+        """
+        words = [word for word in _WORD_RE.findall(query.lower()) if word not in _STOP_WORDS]
+        terms = [stem(word) for word in words]
+        if not terms:
+            return []
+
+        total = len(self._terms) or 1
+        matches = []
+        last = len(terms) - 1
+        for position, (word, term) in enumerate(zip(words, terms)):
+            postings = self._postings.get(term)
+            if len(word) >= 2 and (position == last or not word.isdigit()):
+                # Слово может быть сокращённым или недописанным (последнее)
+                variants = set(self._prefix_terms(word.replace("ё", "е")))
+                if postings:
+                    variants.add(term)
+                postings = self._merged_postings(variants) if variants else None
+            if postings:
+                idf = math.log(1 + total / len(postings))
+                matches.append((idf, postings))
+        if not matches:
+            return []
+
+        # Все слова: пересекаем списки начиная с самого короткого
+        matches.sort(key=lambda item: len(item[1]))
+        scores: Dict[int, float] = {}
+        if len(matches) == 1:
+            # Одно слово: idf одинаков для всех, ранжируем по весу
+            scores = self._accepted(matches[0][1], accept)
+        elif len(matches) == len(terms):
+            common = matches[0][1].keys()
+            for _, postings in matches[1:]:
+                common = common & postings.keys()
+            scores = {
+                tariff_id: sum(idf * postings[tariff_id] for idf, postings in matches)
+                for tariff_id in common
+            }
+            scores = self._accepted(scores, accept)
+        if not scores:
+            for idf, postings in matches:
+                for tariff_id, weight in postings.items():
+                    scores[tariff_id] = scores.get(tariff_id, 0.0) + idf * weight
+            scores = self._accepted(scores, accept)
+
+        # При равной релевантности — более ранние тарифы
+        best = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [tariff_id for tariff_id, _ in best[offset:]]
+
+    @staticmethod
+    def _accepted(
+        scores: Dict[int, float],
+        accept: Optional[Callable[[int], bool]],
+    ) -> Dict[int, float]:
+        if accept is None:
+            return scores
+        return {tariff_id: score for tariff_id, score in scores.items() if accept(tariff_id)}
@@ -0,0 +1,226 @@
+"""
+Хранилище каталога в SQLite.
+
+Таблицы operators / tariffs / payment_methods с индексами и таблица meta
+со счётчиками ID. Изменения каталога приходят в виде тех же операций,
+что пишутся в JSON-журнал, и применяются одной транзакцией; сами операции
+(с временем и ID администратора) остаются в таблице audit_log.
+"""
+import json
+import sqlite3
+from pathlib import Path
+from typing import List
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operators (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tariffs (
+    id INTEGER PRIMARY KEY,
+    operator_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    monthly_fee INTEGER,
+    connection_price INTEGER NOT NULL,
+    is_public INTEGER NOT NULL DEFAULT 1,
+    regions TEXT NOT NULL DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_tariffs_operator ON tariffs (operator_id, is_public);
+CREATE TABLE IF NOT EXISTS payment_methods (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    details TEXT NOT NULL DEFAULT '',
+    is_active INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audit_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    actor INTEGER,
+    op TEXT NOT NULL
+);
+"""
+
+_TARIFF_COLUMNS = (
+    "id", "operator_id", "name", "description",
+    "monthly_fee", "connection_price", "is_public", "regions",
+)
+_PAYMENT_METHOD_COLUMNS = ("id", "name", "details", "is_active")
+_COUNTERS = ("next_operator_id", "next_tariff_id", "next_payment_method_id")
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Открыть базу каталога и создать таблицы"""
+    conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    conn.executescript(_SCHEMA)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tariffs)")}
+    if "regions" not in columns:
+        # База создана до появления регионов
+        try:
+            conn.execute("ALTER TABLE tariffs ADD COLUMN regions TEXT NOT NULL DEFAULT '[]'")
+        except sqlite3.OperationalError:
+            # Колонку уже добавил другой процесс
+            pass
+    return conn
+
+
+def data_version(conn: sqlite3.Connection) -> int:
+    """Счётчик изменений базы другими соединениями"""
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+def is_empty(conn: sqlite3.Connection) -> bool:
+    """Каталог ещё не импортирован"""
+    return conn.execute("SELECT COUNT(*) FROM meta").fetchone()[0] == 0
+
+
+def _column_value(column: str, value):
+    if column == "regions":
+        return json.dumps(list(value or ()), ensure_ascii=False)
+    return value
+
+
+def _insert(conn: sqlite3.Connection, table: str, columns: tuple, record: dict) -> None:
+    placeholders = ", ".join("?" for _ in columns)
+    conn.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+        [_column_value(column, record.get(column)) for column in columns],
+    )
+
+
+def _update(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: tuple,
+    record_id: int,
+    fields: dict,
+) -> None:
+    unknown = set(fields) - set(columns)
+    if unknown:
+        raise ValueError(f"unknown {table} fields: {sorted(unknown)}")
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    conn.execute(
+        f"UPDATE {table} SET {assignments} WHERE id = ?",
+        [*(_column_value(column, value) for column, value in fields.items()), record_id],
+    )
+
+
+def _bump_counter(conn: sqlite3.Connection, key: str, record_id: int) -> None:
+    conn.execute(
+        "UPDATE meta SET value = MAX(value, ?) WHERE key = ?",
+        (record_id + 1, key),
+    )
+
+
+def _apply(conn: sqlite3.Connection, op: dict) -> None:
+    kind = op["op"]
+    if kind == "add_operator":
+        _insert(conn, "operators", ("id", "name"), op["operator"])
+        _bump_counter(conn, "next_operator_id", op["operator"]["id"])
+    elif kind == "delete_operator":
+        conn.execute("DELETE FROM tariffs WHERE operator_id = ?", (op["id"],))
+        conn.execute("DELETE FROM operators WHERE id = ?", (op["id"],))
+    elif kind == "add_tariff":
+        _insert(conn, "tariffs", _TARIFF_COLUMNS, op["tariff"])
+        _bump_counter(conn, "next_tariff_id", op["tariff"]["id"])
+    elif kind == "update_tariff":
+        _update(conn, "tariffs", _TARIFF_COLUMNS, op["id"], op["fields"])
+    elif kind == "delete_tariff":
+        conn.execute("DELETE FROM tariffs WHERE id = ?", (op["id"],))
+    elif kind == "add_payment_method":
+        _insert(conn, "payment_methods", _PAYMENT_METHOD_COLUMNS, op["payment_method"])
+        _bump_counter(conn, "next_payment_method_id", op["payment_method"]["id"])
+    elif kind == "update_payment_method":
+        _update(conn, "payment_methods", _PAYMENT_METHOD_COLUMNS, op["id"], op["fields"])
+    elif kind == "delete_payment_method":
+        conn.execute("DELETE FROM payment_methods WHERE id = ?", (op["id"],))
+    elif kind == "batch":
+        for item in op["ops"]:
+            _apply(conn, item)
+    else:
+        raise ValueError(f"unknown catalog operation: {kind}")
+
+
+def apply_ops(conn: sqlite3.Connection, ops: List[dict]) -> None:
+    """Применить операции каталога в одной транзакции и записать их в audit_log"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for op in ops:
+            _apply(conn, op)
+            conn.execute(
+                "INSERT INTO audit_log (ts, actor, op) VALUES (?, ?, ?)",
+                (op.get("ts", ""), op.get("actor"), json.dumps(op, ensure_ascii=False)),
+            )
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def import_store(conn: sqlite3.Connection, store: dict) -> None:
+    """Импортировать каталог из store.json (в одной транзакции)"""
+    conn.execute("BEGIN IMMEDIATE")
+    if not is_empty(conn):
+        # Другой процесс уже импортировал каталог
+        conn.execute("ROLLBACK")
+        return
+    try:
+        conn.execute("DELETE FROM operators")
+        conn.execute("DELETE FROM tariffs")
+        conn.execute("DELETE FROM payment_methods")
+        conn.execute("DELETE FROM meta")
+        for operator in store["operators"]:
+            _insert(conn, "operators", ("id", "name"), operator)
+        for tariff in store["tariffs"]:
+            _insert(conn, "tariffs", _TARIFF_COLUMNS, tariff)
+        for pm in store["payment_methods"]:
+            _insert(conn, "payment_methods", _PAYMENT_METHOD_COLUMNS, pm)
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [(key, store[key]) for key in _COUNTERS],
+        )
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def load_store(conn: sqlite3.Connection) -> dict:
+    """Прочитать каталог в формате store.json (согласованный снимок)"""
+    conn.row_factory = sqlite3.Row
+    conn.execute("BEGIN")
+    try:
+        operators = [
+            dict(row) for row in conn.execute("SELECT id, name FROM operators ORDER BY id")
+        ]
+        tariffs = []
+        for row in conn.execute(f"SELECT {', '.join(_TARIFF_COLUMNS)} FROM tariffs ORDER BY id"):
+            tariff = dict(row)
+            tariff["is_public"] = bool(tariff["is_public"])
+            tariff["regions"] = json.loads(tariff["regions"])
+            tariffs.append(tariff)
+        payment_methods = []
+        for row in conn.execute(
+            f"SELECT {', '.join(_PAYMENT_METHOD_COLUMNS)} FROM payment_methods ORDER BY id"
+        ):
+            pm = dict(row)
+            pm["is_active"] = bool(pm["is_active"])
+            payment_methods.append(pm)
+        counters = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    finally:
+        conn.execute("COMMIT")
+        conn.row_factory = None
+
+    store = {
+        "operators": operators,
+        "tariffs": tariffs,
+        "payment_methods": payment_methods,
+    }
+    for key in _COUNTERS:
+        store[key] = counters.get(key, 1)
+    return store
@@ -1,27 +1,121 @@
 """
 Каталог операторов и тарифов с хранением в JSON.
 """
+import asyncio
 import copy
+import ctypes
+import ctypes.util
+import functools
+import heapq
 import json
+import logging
+import os
+import select
+import struct
+import sys
 import threading
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field, replace
+from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+from data import sqlite_catalog
+from data.budget import TariffPriceIndex, budget_rank
+from data.search import TariffSearchIndex
 
-_STORE_PATH = Path(__file__).resolve().parent / "store.json"
-_LOCK = threading.Lock()
-_UNSET = object()
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессной блокировки нет, один процесс на каталог
+    fcntl = None
 
+try:
+    import orjson
+except ImportError:  # Необязательная зависимость: без неё работает стандартный json
+    orjson = None
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+_STORE_PATH = Path(__file__).resolve().parent / "store.json"
+# Версия формата store.json: 2 — компактный UTF-8 с заголовком format_version.
+# Файл с актуальной версией уже нормализован и читается без проверок.
+_FORMAT_VERSION = 2
+_LOCK = threading.RLock()
+_UNSET = object()
+# Все записи каталога выполняются последовательно в отдельном потоке
+_WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-writer")
+
+# Разобранный каталог держим в памяти и перечитываем файл только
+# если изменились его mtime/размер или был сброшен снимок.
+_snapshot: Optional[dict] = None
+_snapshot_stat: Optional[tuple] = None
+_version = 0
+
+# Каждое изменение дописывается строкой JSONL в журнал рядом со store.json,
+# а сам store.json периодически переписывается целиком (компактизация):
+# атомарно через временный файл + fsync + rename.
+_COMPACT_EVERY = 200
+_COMPACT_DELAY = 0.5
+_COMPACT_LOCK = threading.Lock()
+_journal_seq = 0
+_journal_entries = 0
+_journal_offset = 0  # Байт журнала уже применено к снимку
+_store_outdated = False  # store.json в старом формате — перепишется при компактизации
+_compact_timer: Optional[threading.Timer] = None
+
+# Журнал аудита: кто и когда менял каталог. Строка журнала (и запись
+# audit_log в SQLite) хранит actor — ID администратора из catalog_actor().
+# При компактизации свёрнутые строки журнала не стираются, а дописываются
+# в архив store.journal.archive.jsonl, который только растёт.
+_actor: ContextVar[Optional[int]] = ContextVar("catalog_actor", default=None)
+
+# Запись каталога несколькими процессами (два бота, админский скрипт):
+# каждое изменение делается под межпроцессной блокировкой (flock на файле
+# рядом с хранилищем) по свежему снимку. journal_seq — поколение каталога:
+# хранится в store.json и в каждой строке журнала и растёт с каждой операцией.
+# Блокировки берутся строго в порядке: _FILE_LOCK -> flock -> _LOCK.
+_FILE_LOCK = threading.RLock()
+_file_lock_depth = 0
+
+# Наблюдатель за хранилищем: пока он запущен, чтения не проверяют файлы
+# на каждом вызове — снимок перечитывает фоновый поток по событию inotify
+# (или по таймеру, если inotify недоступен).
+_WATCH_INTERVAL = 0.5
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_Q_OVERFLOW = 0x4000
+_INOTIFY_EVENT = struct.Struct("iIII")
+_watcher: Optional[threading.Thread] = None
+_watcher_mode = ""
+_watcher_stop = threading.Event()
+
+# Готовые тексты карточек тарифов: (ID тарифа, админская?) -> HTML.
+# Кэш действителен для одной версии каталога и сбрасывается при любом изменении.
+_render_cache: Dict[Tuple[int, bool], str] = {}
+_render_cache_version = -1
+
+# Хранилище каталога: "json" (store.json + журнал) или "sqlite"
+_BACKENDS = ("json", "sqlite")
+_backend = "json"
+_sqlite_path = Path(__file__).resolve().parent / "catalog.db"
+_sqlite_conn = None
+
+
+# slots=True требует Python 3.10+ (см. README)
+@dataclass(frozen=True, slots=True)
 class Operator:
     """Модель оператора"""
     id: int
     name: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Tariff:
     """Модель тарифа"""
     id: int
@@ -31,9 +125,16 @@ class Tariff:
     monthly_fee: Optional[int]
     connection_price: int
     is_public: bool
+    # Регионы, где тариф доступен; пусто — во всех регионах
+    regions: Tuple[str, ...] = ()
 
+    def __post_init__(self) -> None:
+        # Из JSON регионы приходят списком
+        if not isinstance(self.regions, tuple):
+            object.__setattr__(self, "regions", tuple(self.regions))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class PaymentMethod:
     """Модель способа оплаты (банк/карта)"""
     id: int
@@ -42,6 +143,15 @@ class PaymentMethod:
     is_active: bool     # Активен ли способ оплаты
 
 
+# Записи каталога неизменяемы: создаются один раз при загрузке или изменении
+# и разделяются всеми читателями, правка тарифа создаёт новую запись.
+_RECORD_TYPES = {
+    "operators": Operator,
+    "tariffs": Tariff,
+    "payment_methods": PaymentMethod,
+}
+
+
 _DEFAULT_OPERATORS = [
     {"id": 1, "name": "MTS"},
     {"id": 2, "name": "Megafon"},
@@ -57,12 +167,528 @@ _DEFAULT_STORE = {
     "next_operator_id": 6,
     "next_tariff_id": 1,
     "next_payment_method_id": 1,
+    "journal_seq": 0,
+}
+
+
+@dataclass
+class _CatalogIndex:
+    """Индексы каталога: первичные ключи и тарифы по оператору"""
+    operators: Dict[int, Operator] = field(default_factory=dict)
+    tariffs: Dict[int, Tariff] = field(default_factory=dict)
+    tariffs_by_operator: Dict[int, List[Tariff]] = field(default_factory=dict)
+    public_tariffs_by_operator: Dict[int, List[Tariff]] = field(default_factory=dict)
+    payment_methods: Dict[int, PaymentMethod] = field(default_factory=dict)
+    # (ID оператора, со скрытыми?) -> страницы тарифов; строятся при первом
+    # обращении и сбрасываются при любом изменении каталога
+    tariff_pages: Dict[Tuple[int, bool, Optional[str]], List[List[Tariff]]] = field(default_factory=dict)
+    # Поисковый индекс строится при первом поиске и дальше обновляется операциями
+    search: Optional[TariffSearchIndex] = None
+    # ID оператора -> цены публичных тарифов для подбора по бюджету;
+    # строятся при первом подборе и сбрасываются при изменении тарифов оператора
+    price_indexes: Dict[int, TariffPriceIndex] = field(default_factory=dict)
+    # Ключ региона -> ID оператора -> ID тарифов; ключ "" — тарифы без
+    # ограничения по регионам. Строится при первом обращении к регионам
+    # и дальше обновляется операциями. region_names: ключ -> название
+    regions: Optional[Dict[str, Dict[int, Set[int]]]] = None
+    region_names: Dict[str, str] = field(default_factory=dict)
+    # Внутри пакета операций: операторы, чьи списки тарифов пересоберутся
+    # один раз в конце пакета (а не на каждое изменение)
+    stale_operators: Optional[Set[int]] = None
+
+
+_index = _CatalogIndex()
+_page_size = 10
+
+
+def _to_records(store: dict) -> dict:
+    """Списки словарей из store.json -> словари ID -> запись"""
+    for key, record_type in _RECORD_TYPES.items():
+        store[key] = {row["id"]: record_type(**row) for row in store[key]}
+    return store
+
+
+def _record_row(record) -> dict:
+    return {name: getattr(record, name) for name in record.__slots__}
+
+
+def _store_rows(store: dict) -> dict:
+    """Снимок каталога в формате store.json"""
+    rows = dict(store)
+    for key in _RECORD_TYPES:
+        rows[key] = [_record_row(record) for record in store[key].values()]
+    return rows
+
+
+def region_key(name: str) -> str:
+    """Ключ региона для сравнения: нижний регистр, ё -> е, одиночные пробелы"""
+    return " ".join(name.lower().replace("ё", "е").split())
+
+
+def clean_regions(regions: Iterable[str]) -> List[str]:
+    """Названия регионов без пустых и повторов (порядок сохраняется)"""
+    seen = set()
+    cleaned = []
+    for name in regions:
+        name = " ".join(str(name).split())
+        key = region_key(name)
+        if key and key not in seen:
+            seen.add(key)
+            cleaned.append(name)
+    return cleaned
+
+
+def _index_tariff_regions(index: _CatalogIndex, tariff: Tariff) -> None:
+    if index.regions is None:
+        return
+    for name in tariff.regions or ("",):
+        key = region_key(name)
+        index.regions.setdefault(key, {}).setdefault(tariff.operator_id, set()).add(tariff.id)
+        if key:
+            index.region_names.setdefault(key, name)
+
+
+def _unindex_tariff_regions(index: _CatalogIndex, tariff: Tariff) -> None:
+    if index.regions is None:
+        return
+    for name in tariff.regions or ("",):
+        key = region_key(name)
+        by_operator = index.regions.get(key)
+        if by_operator is None:
+            continue
+        ids = by_operator.get(tariff.operator_id)
+        if ids is not None:
+            ids.discard(tariff.id)
+            if not ids:
+                del by_operator[tariff.operator_id]
+        if not by_operator:
+            del index.regions[key]
+            index.region_names.pop(key, None)
+
+
+def _region_index() -> Dict[str, Dict[int, Set[int]]]:
+    """Индекс регионов текущего снимка (строится при первом вызове)"""
+    if _index.regions is None:
+        _index.regions = {}
+        for tariff in _index.tariffs.values():
+            _index_tariff_regions(_index, tariff)
+    return _index.regions
+
+
+def _build_index(store: dict) -> _CatalogIndex:
+    # Словари снимка и есть индексы по первичному ключу
+    index = _CatalogIndex(
+        operators=store["operators"],
+        tariffs=store["tariffs"],
+        payment_methods=store["payment_methods"],
+    )
+    for tariff in index.tariffs.values():
+        index.tariffs_by_operator.setdefault(tariff.operator_id, []).append(tariff)
+    for operator_id in index.tariffs_by_operator:
+        _reindex_public_tariffs(index, operator_id)
+    return index
+
+
+def _reindex_public_tariffs(index: _CatalogIndex, operator_id: int) -> None:
+    index.price_indexes.pop(operator_id, None)
+    public = [
+        tariff for tariff in index.tariffs_by_operator.get(operator_id, [])
+        if tariff.is_public
+    ]
+    if public:
+        index.public_tariffs_by_operator[operator_id] = public
+    else:
+        index.public_tariffs_by_operator.pop(operator_id, None)
+
+
+def _refresh_operator_tariffs(index: _CatalogIndex, operator_id: int) -> None:
+    """Заменить в списке оператора изменённые записи, убрать удалённые"""
+    tariffs = [
+        index.tariffs[item.id]
+        for item in index.tariffs_by_operator.get(operator_id, [])
+        if item.id in index.tariffs
+    ]
+    if tariffs:
+        index.tariffs_by_operator[operator_id] = tariffs
+    else:
+        index.tariffs_by_operator.pop(operator_id, None)
+    _reindex_public_tariffs(index, operator_id)
+
+
+def _operator_tariffs_changed(index: _CatalogIndex, operator_id: int) -> None:
+    if index.stale_operators is not None:
+        index.stale_operators.add(operator_id)
+    else:
+        _refresh_operator_tariffs(index, operator_id)
+
+# ============== Операции журнала ==============
+
+def _op_add_operator(store: dict, index: _CatalogIndex, op: dict) -> None:
+    operator = Operator(**op["operator"])
+    index.operators[operator.id] = operator
+    store["next_operator_id"] = max(store["next_operator_id"], operator.id + 1)
+
+
+def _op_delete_operator(store: dict, index: _CatalogIndex, op: dict) -> None:
+    operator_id = op["id"]
+    if index.operators.pop(operator_id, None) is None:
+        return
+
+    for item in index.tariffs_by_operator.pop(operator_id, []):
+        # В пакете список оператора может хранить старые версии записей
+        tariff = index.tariffs.pop(item.id, None)
+        if tariff is None:
+            continue
+        _unindex_tariff_regions(index, tariff)
+        if index.search is not None:
+            index.search.remove(tariff.id)
+    index.public_tariffs_by_operator.pop(operator_id, None)
+    index.price_indexes.pop(operator_id, None)
+
+
+def _op_add_tariff(store: dict, index: _CatalogIndex, op: dict) -> None:
+    tariff = Tariff(**op["tariff"])
+    index.tariffs[tariff.id] = tariff
+    index.tariffs_by_operator.setdefault(tariff.operator_id, []).append(tariff)
+    _index_tariff_regions(index, tariff)
+    if tariff.is_public:
+        index.public_tariffs_by_operator.setdefault(tariff.operator_id, []).append(tariff)
+        index.price_indexes.pop(tariff.operator_id, None)
+    if index.search is not None:
+        index.search.add(tariff)
+    store["next_tariff_id"] = max(store["next_tariff_id"], tariff.id + 1)
+
+
+# Поля, которые попадают в поисковый индекс
+_SEARCH_FIELDS = frozenset({"name", "description", "monthly_fee", "connection_price"})
+
+
+def _op_update_tariff(store: dict, index: _CatalogIndex, op: dict) -> None:
+    old = index.tariffs.get(op["id"])
+    if old is None:
+        return
+
+    tariff = replace(old, **op["fields"])
+    index.tariffs[tariff.id] = tariff
+    _operator_tariffs_changed(index, tariff.operator_id)
+    if "regions" in op["fields"]:
+        _unindex_tariff_regions(index, old)
+        _index_tariff_regions(index, tariff)
+    if index.search is not None and not _SEARCH_FIELDS.isdisjoint(op["fields"]):
+        index.search.add(tariff)
+
+
+def _op_delete_tariff(store: dict, index: _CatalogIndex, op: dict) -> None:
+    tariff = index.tariffs.pop(op["id"], None)
+    if tariff is None:
+        return
+
+    _operator_tariffs_changed(index, tariff.operator_id)
+    _unindex_tariff_regions(index, tariff)
+    if index.search is not None:
+        index.search.remove(tariff.id)
+
+
+def _op_add_payment_method(store: dict, index: _CatalogIndex, op: dict) -> None:
+    pm = PaymentMethod(**op["payment_method"])
+    index.payment_methods[pm.id] = pm
+    store["next_payment_method_id"] = max(store["next_payment_method_id"], pm.id + 1)
+
+
+def _op_update_payment_method(store: dict, index: _CatalogIndex, op: dict) -> None:
+    pm = index.payment_methods.get(op["id"])
+    if pm is not None:
+        index.payment_methods[pm.id] = replace(pm, **op["fields"])
+
+
+def _op_delete_payment_method(store: dict, index: _CatalogIndex, op: dict) -> None:
+    index.payment_methods.pop(op["id"], None)
+
+
+def _op_batch(store: dict, index: _CatalogIndex, op: dict) -> None:
+    # Списки тарифов операторов пересобираются один раз на пакет:
+    # иначе N изменений одного оператора стоят O(N²)
+    nested = index.stale_operators is not None
+    if not nested:
+        index.stale_operators = set()
+    try:
+        for item in op["ops"]:
+            _OPERATIONS[item["op"]](store, index, item)
+    finally:
+        if not nested:
+            stale, index.stale_operators = index.stale_operators, None
+            for operator_id in stale:
+                _refresh_operator_tariffs(index, operator_id)
+
+
+_OPERATIONS = {
+    "add_operator": _op_add_operator,
+    "delete_operator": _op_delete_operator,
+    "add_tariff": _op_add_tariff,
+    "update_tariff": _op_update_tariff,
+    "delete_tariff": _op_delete_tariff,
+    "add_payment_method": _op_add_payment_method,
+    "update_payment_method": _op_update_payment_method,
+    "delete_payment_method": _op_delete_payment_method,
+    "batch": _op_batch,
 }
 
 
-def _save_store(store: dict) -> None:
-    with _STORE_PATH.open("w", encoding="utf-8") as file:
-        json.dump(store, file, ensure_ascii=True, indent=2)
+def _apply_op(store: dict, index: _CatalogIndex, op: dict) -> None:
+    _OPERATIONS[op["op"]](store, index, op)
+    store["journal_seq"] = op["seq"]
+    index.tariff_pages.clear()
+
+
+# ============== Хранение ==============
+
+def _journal_path() -> Path:
+    return _STORE_PATH.with_name(_STORE_PATH.stem + ".journal.jsonl")
+
+
+def _journal_archive_path() -> Path:
+    return _STORE_PATH.with_name(_STORE_PATH.stem + ".journal.archive.jsonl")
+
+
+def _lock_path() -> Path:
+    path = _sqlite_path if _backend == "sqlite" else _STORE_PATH
+    return path.with_name(path.name + ".lock")
+
+
+def _file_stat(path: Path) -> Optional[Tuple[int, int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    # Inode меняется при атомарной замене файла другим процессом
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _sqlite_connection():
+    global _sqlite_conn
+    if _sqlite_conn is None:
+        _sqlite_conn = sqlite_catalog.connect(_sqlite_path)
+    return _sqlite_conn
+
+
+def _json_stat() -> tuple:
+    return _file_stat(_STORE_PATH), _file_stat(_journal_path())
+
+
+def _disk_stat() -> tuple:
+    if _backend == "sqlite":
+        return "sqlite", sqlite_catalog.data_version(_sqlite_connection())
+    return _json_stat()
+
+
+def _set_snapshot(
+    store: Optional[dict],
+    index: Optional[_CatalogIndex] = None,
+    stat: Optional[tuple] = None,
+) -> None:
+    global _snapshot, _snapshot_stat, _index, _version
+    _snapshot = store
+    if store is None:
+        _snapshot_stat = None
+    else:
+        _snapshot_stat = stat if stat is not None else _disk_stat()
+    if store is None:
+        _index = _CatalogIndex()
+    else:
+        _index = index if index is not None else _build_index(store)
+    _version += 1
+
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(value) -> bytes:
+    """Компактный JSON в UTF-8 (кириллица без \\uXXXX)"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _write_file(payload: bytes) -> None:
+    tmp_path = _STORE_PATH.with_name(_STORE_PATH.name + ".tmp")
+    with tmp_path.open("wb") as file:
+        file.write(payload)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, _STORE_PATH)
+
+
+def _serialize(rows: dict) -> bytes:
+    # Заголовок с версией формата идёт первым ключом
+    rows = {"format_version": _FORMAT_VERSION, **rows}
+    rows["format_version"] = _FORMAT_VERSION
+    return _json_dumps(rows)
+
+
+def _dump_store(store: dict) -> bytes:
+    return _serialize(_store_rows(store))
+
+
+def _read_journal(offset: int = 0) -> Tuple[List[dict], int]:
+    """Операции журнала начиная с offset и смещение после последней целой строки"""
+    path = _journal_path()
+    if not path.exists():
+        return [], 0
+
+    ops = []
+    with path.open("rb") as file:
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b"\n"):
+                # Строка ещё дописывается (или оборвана сбоем)
+                break
+            try:
+                ops.append(_json_loads(line))
+            except ValueError:
+                # Недописанная строка после сбоя: дальше журнал не читаем
+                break
+            offset += len(line)
+    return ops, offset
+
+
+def _append_journal(op: dict, offset: int) -> int:
+    """Дописать операцию после offset — конца последней целой строки.
+
+    Вызывается под межпроцессной блокировкой, поэтому байты после offset
+    могут остаться только от сбоя посреди записи: их обрезаем, иначе новая
+    строка склеится с оборванной и при чтении потеряется вместе со всеми
+    следующими.
+    """
+    line = _json_dumps(op) + b"\n"
+    with _journal_path().open("ab") as file:
+        size = file.seek(0, os.SEEK_END)
+        if size > offset:
+            logger.warning("Журнал каталога: обрезана оборванная запись (%s байт)", size - offset)
+            file.truncate(offset)
+        file.write(line)
+        file.flush()
+        os.fsync(file.fileno())
+    return len(line)
+
+
+def _archive_journal(size: int) -> None:
+    """Дописать первые size байт журнала в архив (перед его очисткой)"""
+    if not size:
+        return
+    with _journal_path().open("rb") as journal:
+        data = journal.read(size)
+    with _journal_archive_path().open("ab") as archive:
+        archive.write(data)
+        archive.flush()
+        os.fsync(archive.fileno())
+
+
+class CatalogConflictError(RuntimeError):
+    """Каталог на диске изменился после чтения снимка (другим процессом)"""
+
+
+@contextmanager
+def _interprocess_lock():
+    """Эксклюзивная блокировка хранилища для всех процессов (реентерабельная)"""
+    global _file_lock_depth
+    with _FILE_LOCK:
+        if _file_lock_depth or fcntl is None:
+            _file_lock_depth += 1
+            try:
+                yield
+            finally:
+                _file_lock_depth -= 1
+            return
+
+        with _lock_path().open("a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            _file_lock_depth += 1
+            try:
+                yield
+            finally:
+                _file_lock_depth -= 1
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def _writing():
+    """Изменение каталога: блокировки и свежий снимок с диска"""
+    with _interprocess_lock():
+        with _LOCK:
+            yield _load_store(fresh=True)
+
+
+def _commit(op: dict) -> None:
+    """Применить операцию к снимку и дописать её в журнал.
+
+    Вызывается только внутри _writing(). Запись выполняется как
+    compare-and-swap: если поколение на диске уже не то, из которого
+    построен снимок, операция отклоняется.
+    """
+    global _journal_seq, _journal_entries, _journal_offset, _snapshot_stat, _version
+    if _disk_stat() != _snapshot_stat:
+        raise CatalogConflictError("catalog changed on disk since the snapshot was read")
+    op["seq"] = _journal_seq + 1
+    op["ts"] = datetime.now().isoformat(timespec="seconds")
+    op["actor"] = _actor.get()
+    if _backend == "sqlite":
+        sqlite_catalog.apply_ops(_sqlite_connection(), [op])
+    else:
+        _journal_offset += _append_journal(op, _journal_offset)
+        _journal_entries += 1
+    _apply_op(_snapshot, _index, op)
+    _journal_seq = op["seq"]
+    _snapshot_stat = _disk_stat()
+    _version += 1
+    if _journal_entries >= _COMPACT_EVERY:
+        _schedule_compaction()
+
+
+def _schedule_compaction() -> None:
+    global _compact_timer
+    if _compact_timer is None:
+        _compact_timer = threading.Timer(_COMPACT_DELAY, flush)
+        _compact_timer.daemon = True
+        _compact_timer.start()
+
+
+def flush() -> None:
+    """Свернуть журнал изменений в новый снимок store.json"""
+    global _compact_timer, _journal_entries, _journal_offset, _snapshot_stat, _store_outdated
+    with _COMPACT_LOCK:
+        with _LOCK:
+            if _compact_timer is not None:
+                _compact_timer.cancel()
+                _compact_timer = None
+            if _snapshot is None or _backend == "sqlite":
+                return
+
+        # Пока держим блокировку, другие процессы журнал не дописывают и не сворачивают
+        with _interprocess_lock():
+            with _LOCK:
+                _load_store(fresh=True)
+                if not _journal_entries and not _store_outdated:
+                    return
+                payload = _dump_store(_snapshot)
+                compacted_seq = _journal_seq
+
+            # Читатели этого процесса не ждут записи файла
+            _write_file(payload)
+
+            with _LOCK:
+                # Операции, попавшие в журнал во время записи, остаются в нём;
+                # уже свёрнутые пропускаются при чтении по journal_seq снимка.
+                if _journal_seq == compacted_seq:
+                    _archive_journal(_journal_offset)
+                    _journal_path().open("w").close()
+                    _journal_entries = 0
+                    _journal_offset = 0
+                _snapshot["format_version"] = _FORMAT_VERSION
+                _store_outdated = False
+                _snapshot_stat = _disk_stat()
 
 
 def _next_id(items: List[dict]) -> int:
@@ -75,62 +701,310 @@ def _next_id(items: List[dict]) -> int:
 
 
 def _normalize_store(store: dict) -> dict:
-    changed = False
+    """Дополнить store.json старого формата недостающими полями.
+
+    Файл не перезаписывается: это сделает компактизация (см. _store_outdated).
+    """
+    if store.get("format_version") == _FORMAT_VERSION:
+        return store
+
     if not store:
         store = copy.deepcopy(_DEFAULT_STORE)
-        changed = True
 
     if "operators" not in store:
         store["operators"] = copy.deepcopy(_DEFAULT_OPERATORS)
-        changed = True
     if "tariffs" not in store:
         store["tariffs"] = []
-        changed = True
     if "payment_methods" not in store:
         store["payment_methods"] = []
-        changed = True
     if "next_operator_id" not in store:
         store["next_operator_id"] = _next_id(store.get("operators", []))
-        changed = True
     if "next_tariff_id" not in store:
         store["next_tariff_id"] = _next_id(store.get("tariffs", []))
-        changed = True
     if "next_payment_method_id" not in store:
         store["next_payment_method_id"] = _next_id(store.get("payment_methods", []))
-        changed = True
-
-    if changed:
-        _save_store(store)
+    if "journal_seq" not in store:
+        store["journal_seq"] = 0
     return store
 
 
-def _load_store() -> dict:
-    if not _STORE_PATH.exists():
-        store = copy.deepcopy(_DEFAULT_STORE)
-        _save_store(store)
+def _read_json_store() -> Tuple[dict, _CatalogIndex, int, tuple, int]:
+    """Прочитать store.json и доиграть журнал.
+
+    Возвращает также число операций журнала, состояние файлов до чтения
+    и смещение в журнале: если другой процесс допишет журнал во время
+    чтения, следующее обращение заметит расхождение и дочитает его.
+    """
+    while True:
+        stat = _json_stat()
+        if _STORE_PATH.exists():
+            store = _json_loads(_STORE_PATH.read_bytes())
+        else:
+            store = {}
+        store = _to_records(_normalize_store(store))
+
+        index = _build_index(store)
+        ops, offset = _read_journal()
+        ops = [op for op in ops if op["seq"] > store["journal_seq"]]
+        for op in ops:
+            _apply_op(store, index, op)
+
+        # Другой процесс мог свернуть журнал между чтением store.json и журнала
+        if _file_stat(_STORE_PATH) == stat[0]:
+            return store, index, len(ops), stat, offset
+
+
+def _catch_up_journal() -> bool:
+    """Доиграть строки, дописанные в журнал другими процессами.
+
+    Возвращает False, если store.json был перезаписан (компактизация)
+    или журнал не продолжает снимок — тогда каталог читается целиком.
+    """
+    global _journal_seq, _journal_entries, _journal_offset, _snapshot_stat, _version
+    stat = _json_stat()
+    store_stat, journal_stat = stat
+    if store_stat != _snapshot_stat[0] or journal_stat is None:
+        return False
+    if _snapshot_stat[1] is not None and journal_stat[0] != _snapshot_stat[1][0]:
+        return False
+    if journal_stat[2] < _journal_offset:
+        return False
+
+    ops, offset = _read_journal(_journal_offset)
+    if _file_stat(_STORE_PATH) != store_stat:
+        return False
+    seq = _journal_seq
+    for op in ops:
+        seq += 1
+        if op["seq"] != seq:
+            return False
+
+    for op in ops:
+        _apply_op(_snapshot, _index, op)
+    _journal_seq = seq
+    _journal_entries += len(ops)
+    _journal_offset = offset
+    _snapshot_stat = stat
+    if ops:
+        _version += 1
+    return True
+
+
+def _load_store(fresh: bool = False) -> dict:
+    """Текущий снимок каталога.
+
+    fresh=True — сверить с диском даже при запущенном наблюдателе
+    (перед записью и в самом наблюдателе).
+    """
+    global _journal_seq, _journal_entries, _journal_offset, _store_outdated
+    if _snapshot is not None and _watcher is not None and not fresh:
+        return _snapshot
+    if _snapshot is not None and _disk_stat() == _snapshot_stat:
+        return _snapshot
+    if _snapshot is not None and _backend == "json" and _catch_up_journal():
+        if _journal_entries >= _COMPACT_EVERY:
+            _schedule_compaction()
+        return _snapshot
+
+    if _backend == "sqlite":
+        conn = _sqlite_connection()
+        if sqlite_catalog.is_empty(conn):
+            # Первый запуск на SQLite: переносим каталог из store.json
+            json_store = _read_json_store()[0]
+            sqlite_catalog.import_store(conn, _store_rows(json_store))
+        stat = _disk_stat()
+        store = _to_records(sqlite_catalog.load_store(conn))
+        store["journal_seq"] = 0
+        _set_snapshot(store, stat=stat)
+        _journal_seq = 0
+        _journal_entries = 0
+        _journal_offset = 0
         return store
 
-    with _STORE_PATH.open("r", encoding="utf-8") as file:
-        store = json.load(file)
+    store, index, pending, stat, offset = _read_json_store()
+    _set_snapshot(store, index, stat)
+    _journal_seq = store["journal_seq"]
+    _journal_entries = pending
+    _journal_offset = offset
+    _store_outdated = store.get("format_version") != _FORMAT_VERSION
+    if _journal_entries >= _COMPACT_EVERY or _store_outdated:
+        _schedule_compaction()
+    return store
+
+
+def configure_catalog(
+    backend: str = "json",
+    sqlite_path: Optional[Path] = None,
+    page_size: Optional[int] = None,
+) -> None:
+    """Выбрать хранилище каталога: json (store.json + журнал) или sqlite"""
+    global _backend, _sqlite_path, _sqlite_conn, _page_size
+    if backend not in _BACKENDS:
+        raise ValueError(f"unknown catalog backend: {backend}")
+    if page_size is not None:
+        if page_size < 1:
+            raise ValueError(f"page size must be positive: {page_size}")
+        _page_size = page_size
+
+    flush()
+    watching = _watcher is not None
+    stop_catalog_watcher()
+    with _LOCK:
+        if _sqlite_conn is not None:
+            _sqlite_conn.close()
+            _sqlite_conn = None
+        _backend = backend
+        if sqlite_path is not None:
+            path = Path(sqlite_path)
+            if not path.is_absolute():
+                # Относительный путь считаем от корня проекта
+                path = Path(__file__).resolve().parent.parent / path
+            _sqlite_path = path
+        _set_snapshot(None)
+    if watching:
+        start_catalog_watcher()
+
+
+# ============== Наблюдатель за хранилищем ==============
+
+def _watched_files() -> Tuple[Path, set]:
+    if _backend == "sqlite":
+        name = _sqlite_path.name
+        return _sqlite_path.parent, {name, f"{name}-wal", f"{name}-journal"}
+    return _STORE_PATH.parent, {_STORE_PATH.name, _journal_path().name}
+
+
+def _inotify_open(directory: Path) -> Optional[int]:
+    """Дескриптор inotify на каталог хранилища или None, если inotify недоступен"""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _inotify_touched(fd: int, names: set) -> bool:
+    """Прочитать события inotify; True, если затронуты файлы хранилища"""
+    touched = False
+    while True:
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return touched
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if mask & _IN_Q_OVERFLOW or name in names:
+                touched = True
+
+
+def _refresh_snapshot() -> None:
+    try:
+        with _LOCK:
+            if _snapshot is not None:
+                _load_store(fresh=True)
+    except Exception:
+        logger.exception("Не удалось перечитать каталог")
+
+
+def _watch(stop: threading.Event, fd: Optional[int]) -> None:
+    _, names = _watched_files()
+    try:
+        while not stop.is_set():
+            if fd is None:
+                stop.wait(_WATCH_INTERVAL)
+            else:
+                ready, _, _ = select.select([fd], [], [], _WATCH_INTERVAL)
+                if not ready or not _inotify_touched(fd, names):
+                    continue
+            _refresh_snapshot()
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+def start_catalog_watcher() -> str:
+    """Следить за изменениями каталога другими процессами.
+
+    Возвращает способ слежения: "inotify" или "poll" (проверка раз в 0.5 с).
+    """
+    global _watcher, _watcher_mode
+    with _LOCK:
+        if _watcher is not None:
+            return _watcher_mode
+        directory, _ = _watched_files()
+        fd = _inotify_open(directory)
+        _watcher_mode = "inotify" if fd is not None else "poll"
+        _watcher_stop.clear()
+        _watcher = threading.Thread(
+            target=_watch,
+            args=(_watcher_stop, fd),
+            name="catalog-watcher",
+            daemon=True,
+        )
+        # Снимок на момент старта сверяем с диском: дальше это делает поток
+        _load_store(fresh=True)
+        _watcher.start()
+        return _watcher_mode
+
+
+def stop_catalog_watcher() -> None:
+    """Остановить наблюдатель; чтения снова сверяются с диском сами"""
+    global _watcher
+    with _LOCK:
+        watcher, _watcher = _watcher, None
+    if watcher is not None:
+        _watcher_stop.set()
+        watcher.join()
+
 
-    return _normalize_store(store)
+@contextmanager
+def catalog_actor(user_id: Optional[int]):
+    """Записывать изменения каталога внутри блока от имени user_id"""
+    token = _actor.set(user_id)
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+def get_catalog_version() -> int:
+    """Номер версии каталога в памяти (растёт при каждом изменении)"""
+    with _LOCK:
+        _load_store()
+        return _version
+
+
+def invalidate_catalog() -> None:
+    """Сбросить снимок каталога, следующее чтение перечитает файл"""
+    with _LOCK:
+        _set_snapshot(None)
 
 
 def get_all_operators() -> List[Operator]:
     """Получить список операторов"""
     with _LOCK:
-        store = _load_store()
-        return [Operator(**operator) for operator in store["operators"]]
+        _load_store()
+        return list(_index.operators.values())
 
 
 def get_operator_by_id(operator_id: int) -> Optional[Operator]:
     """Получить оператора по ID"""
     with _LOCK:
-        store = _load_store()
-        for operator in store["operators"]:
-            if operator.get("id") == operator_id:
-                return Operator(**operator)
-    return None
+        _load_store()
+        return _index.operators.get(operator_id)
 
 
 def add_operator(name: str) -> Operator:
@@ -139,32 +1013,19 @@ def add_operator(name: str) -> Operator:
     if not clean_name:
         raise ValueError("operator name is empty")
 
-    with _LOCK:
-        store = _load_store()
+    with _writing() as store:
         operator = {"id": store["next_operator_id"], "name": clean_name}
-        store["next_operator_id"] += 1
-        store["operators"].append(operator)
-        _save_store(store)
-        return Operator(**operator)
+        _commit({"op": "add_operator", "operator": operator})
+        return _index.operators[operator["id"]]
 
 
 def delete_operator(operator_id: int) -> bool:
     """Удалить оператора и его тарифы"""
-    with _LOCK:
-        store = _load_store()
-        operators_before = len(store["operators"])
-        store["operators"] = [
-            operator for operator in store["operators"]
-            if operator.get("id") != operator_id
-        ]
-        if len(store["operators"]) == operators_before:
+    with _writing():
+        if operator_id not in _index.operators:
             return False
 
-        store["tariffs"] = [
-            tariff for tariff in store["tariffs"]
-            if tariff.get("operator_id") != operator_id
-        ]
-        _save_store(store)
+        _commit({"op": "delete_operator", "id": operator_id})
         return True
 
 
@@ -174,25 +1035,92 @@ def get_tariffs_by_operator(
 ) -> List[Tariff]:
     """Получить список тарифов оператора"""
     with _LOCK:
-        store = _load_store()
-        tariffs = []
-        for tariff in store["tariffs"]:
-            if tariff.get("operator_id") != operator_id:
-                continue
-            if not include_hidden and not tariff.get("is_public", False):
-                continue
-            tariffs.append(Tariff(**tariff))
+        _load_store()
+        if include_hidden:
+            tariffs = _index.tariffs_by_operator.get(operator_id, [])
+        else:
+            tariffs = _index.public_tariffs_by_operator.get(operator_id, [])
+        return list(tariffs)
+
+
+def _region_tariffs(operator_id: int, region: str, include_hidden: bool) -> List[Tariff]:
+    """Тарифы оператора, доступные в регионе (включая тарифы без ограничений)"""
+    regions = _region_index()
+    ids = regions.get("", {}).get(operator_id, set())
+    in_region = regions.get(region_key(region), {}).get(operator_id)
+    if in_region:
+        ids = ids | in_region
+    tariffs = [_index.tariffs[tariff_id] for tariff_id in sorted(ids)]
+    if include_hidden:
         return tariffs
+    return [tariff for tariff in tariffs if tariff.is_public]
+
+
+def get_tariffs_page(
+    operator_id: int,
+    page: int = 0,
+    include_hidden: bool = False,
+    region: Optional[str] = None,
+) -> Tuple[List[Tariff], int, int]:
+    """Страница тарифов оператора: (тарифы, номер страницы, число страниц).
+
+    Номер страницы приводится к допустимому диапазону. С region — только
+    тарифы, доступные в этом регионе.
+    """
+    with _LOCK:
+        _load_store()
+        key = (operator_id, include_hidden, region_key(region) if region else None)
+        pages = _index.tariff_pages.get(key)
+        if pages is None:
+            if region:
+                tariffs = _region_tariffs(operator_id, region, include_hidden)
+            elif include_hidden:
+                tariffs = _index.tariffs_by_operator.get(operator_id, [])
+            else:
+                tariffs = _index.public_tariffs_by_operator.get(operator_id, [])
+            pages = [
+                tariffs[start:start + _page_size]
+                for start in range(0, len(tariffs), _page_size)
+            ] or [[]]
+            _index.tariff_pages[key] = pages
+
+        page = min(max(page, 0), len(pages) - 1)
+        return list(pages[page]), page, len(pages)
 
 
 def get_tariff_by_id(tariff_id: int) -> Optional[Tariff]:
     """Получить тариф по ID"""
     with _LOCK:
-        store = _load_store()
-        for tariff in store["tariffs"]:
-            if tariff.get("id") == tariff_id:
-                return Tariff(**tariff)
-    return None
+        _load_store()
+        return _index.tariffs.get(tariff_id)
+
+
+def get_regions() -> List[str]:
+    """Названия регионов, указанных в тарифах (по алфавиту)"""
+    with _LOCK:
+        _load_store()
+        _region_index()
+        return sorted(_index.region_names.values(), key=region_key)
+
+
+_CITY_PREFIXES = ("город ", "гор.", "г.", "г ")
+
+
+def find_region(text: str) -> Optional[str]:
+    """Известный регион по тексту пользователя («Москва, ул. ...» -> «Москва»)"""
+    with _LOCK:
+        _load_store()
+        _region_index()
+        for part in text.split(","):
+            key = region_key(part)
+            for prefix in _CITY_PREFIXES:
+                if key.startswith(prefix):
+                    key = key[len(prefix):].lstrip()
+                    break
+            name = _index.region_names.get(key)
+            if name is not None:
+                return name
+        return None
 
 
 def add_tariff(
@@ -202,14 +1130,14 @@ def add_tariff(
     monthly_fee: Optional[int],
     connection_price: int,
     is_public: bool,
+    regions: Iterable[str] = (),
 ) -> Tariff:
-    """Добавить тариф"""
+    """Добавить тариф (без regions — доступен во всех регионах)"""
     clean_name = name.strip()
     if not clean_name:
         raise ValueError("tariff name is empty")
 
-    with _LOCK:
-        store = _load_store()
+    with _writing() as store:
         tariff = {
             "id": store["next_tariff_id"],
             "operator_id": operator_id,
@@ -218,11 +1146,10 @@ def add_tariff(
             "monthly_fee": monthly_fee,
             "connection_price": connection_price,
             "is_public": bool(is_public),
+            "regions": clean_regions(regions),
         }
-        store["next_tariff_id"] += 1
-        store["tariffs"].append(tariff)
-        _save_store(store)
-        return Tariff(**tariff)
+        _commit({"op": "add_tariff", "tariff": tariff})
+        return _index.tariffs[tariff["id"]]
 
 
 def update_tariff(
@@ -233,62 +1160,212 @@ def update_tariff(
     monthly_fee: object = _UNSET,
     connection_price: object = _UNSET,
     is_public: object = _UNSET,
+    regions: object = _UNSET,
 ) -> Optional[Tariff]:
     """Обновить тариф"""
-    with _LOCK:
-        store = _load_store()
-        for tariff in store["tariffs"]:
-            if tariff.get("id") != tariff_id:
-                continue
+    fields = {}
+    if name is not _UNSET:
+        clean_name = str(name).strip()
+        if not clean_name:
+            raise ValueError("tariff name is empty")
+        fields["name"] = clean_name
+
+    if description is not _UNSET:
+        fields["description"] = str(description).strip()
 
-            if name is not _UNSET:
-                clean_name = str(name).strip()
-                if not clean_name:
-                    raise ValueError("tariff name is empty")
-                tariff["name"] = clean_name
+    if monthly_fee is not _UNSET:
+        fields["monthly_fee"] = monthly_fee
 
-            if description is not _UNSET:
-                tariff["description"] = str(description).strip()
+    if connection_price is not _UNSET:
+        fields["connection_price"] = connection_price
 
-            if monthly_fee is not _UNSET:
-                tariff["monthly_fee"] = monthly_fee
+    if is_public is not _UNSET:
+        fields["is_public"] = bool(is_public)
 
-            if connection_price is not _UNSET:
-                tariff["connection_price"] = connection_price
+    if regions is not _UNSET:
+        fields["regions"] = clean_regions(regions)
 
-            if is_public is not _UNSET:
-                tariff["is_public"] = bool(is_public)
+    with _writing():
+        if tariff_id not in _index.tariffs:
+            return None
 
-            _save_store(store)
-            return Tariff(**tariff)
-    return None
+        if fields:
+            _commit({"op": "update_tariff", "id": tariff_id, "fields": fields})
+        return _index.tariffs[tariff_id]
 
 
 def delete_tariff(tariff_id: int) -> bool:
     """Удалить тариф"""
-    with _LOCK:
-        store = _load_store()
-        tariffs_before = len(store["tariffs"])
-        store["tariffs"] = [
-            tariff for tariff in store["tariffs"]
-            if tariff.get("id") != tariff_id
-        ]
-        if len(store["tariffs"]) == tariffs_before:
+    with _writing():
+        if tariff_id not in _index.tariffs:
             return False
-        _save_store(store)
+
+        _commit({"op": "delete_tariff", "id": tariff_id})
         return True
 
 
 def toggle_tariff_visibility(tariff_id: int) -> Optional[Tariff]:
     """Переключить видимость тарифа"""
+    with _writing():
+        tariff = _index.tariffs.get(tariff_id)
+        if tariff is None:
+            return None
+
+        fields = {"is_public": not tariff.is_public}
+        _commit({"op": "update_tariff", "id": tariff_id, "fields": fields})
+        return _index.tariffs[tariff_id]
+
+
+_UPSERT_FIELDS = ("description", "monthly_fee", "connection_price", "is_public", "regions")
+
+
+def bulk_upsert_tariffs(rows: List[dict]) -> Dict[str, int]:
+    """Массово добавить/обновить тарифы одной записью.
+
+    Строка: operator_id, name и любые из description, monthly_fee,
+    connection_price, is_public, regions. Существующий тариф ищется по
+    оператору и названию (без учёта регистра), у него меняются только поля,
+    которые есть в строке. Новому тарифу нужна connection_price, остальные
+    поля по умолчанию: без описания и абонплаты, публичный, все регионы.
+    Повторные строки одного тарифа сливаются, побеждает последняя.
+    Возвращает {"added": ..., "updated": ..., "unchanged": ...}.
+    """
+    with _writing() as store:
+        for row in rows:
+            if row["operator_id"] not in _index.operators:
+                raise ValueError(f"unknown operator id: {row['operator_id']}")
+
+        merged: Dict[tuple, dict] = {}
+        for row in rows:
+            clean_name = str(row["name"]).strip()
+            if not clean_name:
+                raise ValueError("tariff name is empty")
+            values = {"name": clean_name}
+            for name in _UPSERT_FIELDS:
+                # regions=None — регионы не указаны (как и отсутствие ключа)
+                if name not in row or (name == "regions" and row[name] is None):
+                    continue
+                value = row[name]
+                if name == "description":
+                    value = str(value or "").strip()
+                elif name == "is_public":
+                    value = bool(value)
+                elif name == "regions":
+                    value = clean_regions(value)
+                values[name] = value
+            merged.setdefault((row["operator_id"], clean_name.lower()), {}).update(values)
+
+        existing = {
+            (tariff.operator_id, tariff.name.lower()): tariff
+            for tariff in _index.tariffs.values()
+        }
+        added = []
+        updates: Dict[int, dict] = {}
+        next_id = store["next_tariff_id"]
+        for (operator_id, _), values in merged.items():
+            tariff = existing.get((operator_id, values["name"].lower()))
+            if tariff is not None:
+                fields = {
+                    name: value for name, value in values.items()
+                    if getattr(tariff, name) != (tuple(value) if name == "regions" else value)
+                }
+                if fields:
+                    updates[tariff.id] = fields
+                continue
+            if values.get("connection_price") is None:
+                raise ValueError(f"connection price is required for new tariff: {values['name']}")
+            added.append({
+                "id": next_id,
+                "operator_id": operator_id,
+                "description": "",
+                "monthly_fee": None,
+                "is_public": True,
+                "regions": clean_regions(()),
+                **values,
+            })
+            next_id += 1
+
+        ops = [
+            {"op": "update_tariff", "id": tariff_id, "fields": fields}
+            for tariff_id, fields in updates.items()
+        ]
+        ops.extend({"op": "add_tariff", "tariff": tariff} for tariff in added)
+        if ops:
+            _commit({"op": "batch", "ops": ops})
+        return {
+            "added": len(added),
+            "updated": len(updates),
+            "unchanged": len(merged) - len(added) - len(updates),
+        }
+
+
+_BULK_UPDATE_FIELDS = {"name", "description", "monthly_fee", "connection_price", "is_public"}
+
+
+def bulk_update_tariffs(changes: Dict[int, dict]) -> int:
+    """Обновить поля нескольких тарифов одной записью.
+
+    changes: {tariff_id: {поле: значение}}. Несуществующие тарифы и
+    совпадающие значения пропускаются. Возвращает число изменённых тарифов.
+    """
+    for fields in changes.values():
+        unknown = set(fields) - _BULK_UPDATE_FIELDS
+        if unknown:
+            raise ValueError(f"unknown tariff fields: {sorted(unknown)}")
+
+    with _writing():
+        ops = []
+        for tariff_id, fields in changes.items():
+            tariff = _index.tariffs.get(tariff_id)
+            if tariff is None:
+                continue
+            fields = {
+                name: value for name, value in fields.items()
+                if getattr(tariff, name) != value
+            }
+            if fields:
+                ops.append({"op": "update_tariff", "id": tariff_id, "fields": fields})
+
+        if ops:
+            _commit({"op": "batch", "ops": ops})
+        return len(ops)
+
+
+def search_tariffs(query: str, limit: int = 10, offset: int = 0) -> List[Tariff]:
+    """Публичные тарифы, подходящие под текст запроса (по релевантности)"""
     with _LOCK:
-        store = _load_store()
-        for tariff in store["tariffs"]:
-            if tariff.get("id") == tariff_id:
-                tariff["is_public"] = not tariff.get("is_public", False)
-                _save_store(store)
-                return Tariff(**tariff)
-    return None
+        _load_store()
+        if _index.search is None:
+            _index.search = TariffSearchIndex(_index.tariffs.values())
+        tariffs = _index.tariffs
+        ids = _index.search.search(
+            query,
+            limit=limit,
+            accept=lambda tariff_id: tariffs[tariff_id].is_public,
+            offset=offset,
+        )
+        return [tariffs[tariff_id] for tariff_id in ids]
+
+
+def recommend_tariffs(
+    max_monthly_fee: Optional[int] = None,
+    max_connection_price: Optional[int] = None,
+    limit: int = 10,
+) -> List[Tariff]:
+    """Лучшие публичные тарифы всех операторов в пределах бюджета.
+
+    None — без ограничения. Лучше тот, у кого абонплата ближе к бюджету,
+    при равной — дешевле подключение.
+    """
+    with _LOCK:
+        _load_store()
+        found = []
+        for operator_id, tariffs in _index.public_tariffs_by_operator.items():
+            prices = _index.price_indexes.get(operator_id)
+            if prices is None:
+                prices = _index.price_indexes[operator_id] = TariffPriceIndex(tariffs)
+            found.extend(prices.within(max_monthly_fee, max_connection_price, limit))
+        return heapq.nlargest(limit, found, key=budget_rank)
 
 
 def format_tariff_info(tariff: Tariff, operator_name: Optional[str] = None) -> str:
@@ -305,37 +1382,74 @@ def format_tariff_info(tariff: Tariff, operator_name: Optional[str] = None) -> s
     if tariff.monthly_fee:
         lines.append(f"📅 Абонплата: <b>{tariff.monthly_fee:,} ₽/мес</b>")
     lines.append(f"💳 Стоимость подключения: <b>{tariff.connection_price:,} ₽</b>")
+    if tariff.regions:
+        lines.append(f"📍 Регионы: {', '.join(tariff.regions)}")
     return "\n".join(lines)
 
 
+def format_tariff_admin_info(tariff: Tariff, operator_name: Optional[str] = None) -> str:
+    """Карточка тарифа для админ-меню"""
+    status = "Публичный" if tariff.is_public else "Скрытый"
+    monthly_fee = f"{tariff.monthly_fee} ₽/мес" if tariff.monthly_fee else "не указана"
+    regions = ", ".join(tariff.regions) if tariff.regions else "все"
+
+    return (
+        f"<b>Тариф:</b> {tariff.name}\n"
+        f"<b>Оператор:</b> {operator_name or 'Не указан'}\n"
+        f"<b>Статус:</b> {status}\n"
+        f"<b>Абонплата:</b> {monthly_fee}\n"
+        f"<b>Стоимость подключения:</b> {tariff.connection_price} ₽\n"
+        f"<b>Регионы:</b> {regions}\n\n"
+        f"<b>Описание:</b>\n{tariff.description}"
+    )
+
+
+def render_tariff(tariff_id: int, admin: bool = False) -> Optional[str]:
+    """Текст карточки тарифа из кэша текущей версии каталога"""
+    global _render_cache_version
+    with _LOCK:
+        _load_store()
+        if _render_cache_version != _version:
+            _render_cache.clear()
+            _render_cache_version = _version
+
+        key = (tariff_id, admin)
+        text = _render_cache.get(key)
+        if text is None:
+            tariff = _index.tariffs.get(tariff_id)
+            if tariff is None:
+                return None
+            operator = _index.operators.get(tariff.operator_id)
+            operator_name = operator.name if operator else None
+            if admin:
+                text = format_tariff_admin_info(tariff, operator_name)
+            else:
+                text = format_tariff_info(tariff, operator_name)
+            _render_cache[key] = text
+        return text
+
+
 # ============== PaymentMethod CRUD ==============
 
 def get_all_payment_methods() -> List[PaymentMethod]:
     """Получить все способы оплаты"""
     with _LOCK:
-        store = _load_store()
-        return [PaymentMethod(**pm) for pm in store.get("payment_methods", [])]
+        _load_store()
+        return list(_index.payment_methods.values())
 
 
 def get_active_payment_methods() -> List[PaymentMethod]:
     """Получить только активные способы оплаты"""
     with _LOCK:
-        store = _load_store()
-        methods = []
-        for pm in store.get("payment_methods", []):
-            if pm.get("is_active", False):
-                methods.append(PaymentMethod(**pm))
-        return methods
+        _load_store()
+        return [pm for pm in _index.payment_methods.values() if pm.is_active]
 
 
 def get_payment_method_by_id(method_id: int) -> Optional[PaymentMethod]:
     """Получить способ оплаты по ID"""
     with _LOCK:
-        store = _load_store()
-        for pm in store.get("payment_methods", []):
-            if pm.get("id") == method_id:
-                return PaymentMethod(**pm)
-    return None
+        _load_store()
+        return _index.payment_methods.get(method_id)
 
 
 def add_payment_method(name: str, details: str) -> PaymentMethod:
@@ -344,18 +1458,15 @@ def add_payment_method(name: str, details: str) -> PaymentMethod:
     if not clean_name:
         raise ValueError("payment method name is empty")
 
-    with _LOCK:
-        store = _load_store()
+    with _writing() as store:
         payment_method = {
             "id": store["next_payment_method_id"],
             "name": clean_name,
             "details": details.strip(),
             "is_active": True,
         }
-        store["next_payment_method_id"] += 1
-        store["payment_methods"].append(payment_method)
-        _save_store(store)
-        return PaymentMethod(**payment_method)
+        _commit({"op": "add_payment_method", "payment_method": payment_method})
+        return _index.payment_methods[payment_method["id"]]
 
 
 def update_payment_method(
@@ -365,49 +1476,227 @@ def update_payment_method(
     details: object = _UNSET,
 ) -> Optional[PaymentMethod]:
     """Обновить способ оплаты"""
-    with _LOCK:
-        store = _load_store()
-        for pm in store.get("payment_methods", []):
-            if pm.get("id") != method_id:
-                continue
+    fields = {}
+    if name is not _UNSET:
+        clean_name = str(name).strip()
+        if not clean_name:
+            raise ValueError("payment method name is empty")
+        fields["name"] = clean_name
 
-            if name is not _UNSET:
-                clean_name = str(name).strip()
-                if not clean_name:
-                    raise ValueError("payment method name is empty")
-                pm["name"] = clean_name
+    if details is not _UNSET:
+        fields["details"] = str(details).strip()
 
-            if details is not _UNSET:
-                pm["details"] = str(details).strip()
+    with _writing():
+        if method_id not in _index.payment_methods:
+            return None
 
-            _save_store(store)
-            return PaymentMethod(**pm)
-    return None
+        if fields:
+            _commit({"op": "update_payment_method", "id": method_id, "fields": fields})
+        return _index.payment_methods[method_id]
 
 
 def delete_payment_method(method_id: int) -> bool:
     """Удалить способ оплаты"""
-    with _LOCK:
-        store = _load_store()
-        methods_before = len(store.get("payment_methods", []))
-        store["payment_methods"] = [
-            pm for pm in store.get("payment_methods", [])
-            if pm.get("id") != method_id
-        ]
-        if len(store["payment_methods"]) == methods_before:
+    with _writing():
+        if method_id not in _index.payment_methods:
             return False
-        _save_store(store)
+
+        _commit({"op": "delete_payment_method", "id": method_id})
         return True
 
 
 def toggle_payment_method(method_id: int) -> Optional[PaymentMethod]:
     """Переключить активность способа оплаты"""
-    with _LOCK:
-        store = _load_store()
-        for pm in store.get("payment_methods", []):
-            if pm.get("id") == method_id:
-                pm["is_active"] = not pm.get("is_active", False)
-                _save_store(store)
-                return PaymentMethod(**pm)
-    return None
+    with _writing():
+        pm = _index.payment_methods.get(method_id)
+        if pm is None:
+            return None
+
+        fields = {"is_active": not pm.is_active}
+        _commit({"op": "update_payment_method", "id": method_id, "fields": fields})
+        return _index.payment_methods[method_id]
+
+
+# ============== Async API ==============
+
+async def _read(func, *args, **kwargs):
+    """Чтение из памяти; пока идёт запись — ждём её в пуле потоков.
+
+    Прямо в цикле событий читаем только при запущенном наблюдателе: тогда
+    снимок отдаётся без обращения к диску. Без него _load_store сверяет
+    файл и может перечитать каталог — это делаем в пуле потоков.
+    """
+    if _snapshot is not None and _watcher is not None and _LOCK.acquire(blocking=False):
+        try:
+            if _snapshot is not None and _watcher is not None:
+                return func(*args, **kwargs)
+        finally:
+            _LOCK.release()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def _write(func, *args, **kwargs):
+    """Изменение каталога в потоке записи (с контекстом вызова — см. catalog_actor)"""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(_WRITER, call)
+
+
+async def aget_catalog_version() -> int:
+    """Асинхронный get_catalog_version"""
+    return await _read(get_catalog_version)
+
+
+async def aget_all_operators() -> List[Operator]:
+    """Асинхронный get_all_operators"""
+    return await _read(get_all_operators)
+
+
+async def aget_operator_by_id(operator_id: int) -> Optional[Operator]:
+    """Асинхронный get_operator_by_id"""
+    return await _read(get_operator_by_id, operator_id)
+
+
+async def aadd_operator(name: str) -> Operator:
+    """Асинхронный add_operator"""
+    return await _write(add_operator, name)
+
+
+async def adelete_operator(operator_id: int) -> bool:
+    """Асинхронный delete_operator"""
+    return await _write(delete_operator, operator_id)
+
+
+async def aget_tariffs_by_operator(
+    operator_id: int,
+    include_hidden: bool = False,
+) -> List[Tariff]:
+    """Асинхронный get_tariffs_by_operator"""
+    return await _read(get_tariffs_by_operator, operator_id, include_hidden)
+
+
+async def aget_tariffs_page(
+    operator_id: int,
+    page: int = 0,
+    include_hidden: bool = False,
+    region: Optional[str] = None,
+) -> Tuple[List[Tariff], int, int]:
+    """Асинхронный get_tariffs_page"""
+    return await _read(get_tariffs_page, operator_id, page, include_hidden, region)
+
+
+async def asearch_tariffs(query: str, limit: int = 10, offset: int = 0) -> List[Tariff]:
+    """Асинхронный search_tariffs"""
+    return await _read(search_tariffs, query, limit, offset)
+
+
+async def arecommend_tariffs(
+    max_monthly_fee: Optional[int] = None,
+    max_connection_price: Optional[int] = None,
+    limit: int = 10,
+) -> List[Tariff]:
+    """Асинхронный recommend_tariffs"""
+    return await _read(recommend_tariffs, max_monthly_fee, max_connection_price, limit)
+
+
+async def aget_tariff_by_id(tariff_id: int) -> Optional[Tariff]:
+    """Асинхронный get_tariff_by_id"""
+    return await _read(get_tariff_by_id, tariff_id)
+
+
+async def aget_regions() -> List[str]:
+    """Асинхронный get_regions"""
+    return await _read(get_regions)
+
+
+async def afind_region(text: str) -> Optional[str]:
+    """Асинхронный find_region"""
+    return await _read(find_region, text)
+
+
+async def arender_tariff(tariff_id: int, admin: bool = False) -> Optional[str]:
+    """Асинхронный render_tariff"""
+    return await _read(render_tariff, tariff_id, admin)
+
+
+async def aadd_tariff(
+    operator_id: int,
+    name: str,
+    description: str,
+    monthly_fee: Optional[int],
+    connection_price: int,
+    is_public: bool,
+    regions: Iterable[str] = (),
+) -> Tariff:
+    """Асинхронный add_tariff"""
+    return await _write(
+        add_tariff,
+        operator_id=operator_id,
+        name=name,
+        description=description,
+        monthly_fee=monthly_fee,
+        connection_price=connection_price,
+        is_public=is_public,
+        regions=regions,
+    )
+
+
+async def aupdate_tariff(tariff_id: int, **fields) -> Optional[Tariff]:
+    """Асинхронный update_tariff"""
+    return await _write(update_tariff, tariff_id, **fields)
+
+
+async def adelete_tariff(tariff_id: int) -> bool:
+    """Асинхронный delete_tariff"""
+    return await _write(delete_tariff, tariff_id)
+
+
+async def atoggle_tariff_visibility(tariff_id: int) -> Optional[Tariff]:
+    """Асинхронный toggle_tariff_visibility"""
+    return await _write(toggle_tariff_visibility, tariff_id)
+
+
+async def abulk_upsert_tariffs(rows: List[dict]) -> Dict[str, int]:
+    """Асинхронный bulk_upsert_tariffs"""
+    return await _write(bulk_upsert_tariffs, rows)
+
+
+async def abulk_update_tariffs(changes: Dict[int, dict]) -> int:
+    """Асинхронный bulk_update_tariffs"""
+    return await _write(bulk_update_tariffs, changes)
+
+
+async def aget_all_payment_methods() -> List[PaymentMethod]:
+    """Асинхронный get_all_payment_methods"""
+    return await _read(get_all_payment_methods)
+
+
+async def aget_active_payment_methods() -> List[PaymentMethod]:
+    """Асинхронный get_active_payment_methods"""
+    return await _read(get_active_payment_methods)
+
+
+async def aget_payment_method_by_id(method_id: int) -> Optional[PaymentMethod]:
+    """Асинхронный get_payment_method_by_id"""
+    return await _read(get_payment_method_by_id, method_id)
+
+
+async def aadd_payment_method(name: str, details: str) -> PaymentMethod:
+    """Асинхронный add_payment_method"""
+    return await _write(add_payment_method, name, details)
+
+
+async def aupdate_payment_method(method_id: int, **fields) -> Optional[PaymentMethod]:
+    """Асинхронный update_payment_method"""
+    return await _write(update_payment_method, method_id, **fields)
+
+
+async def adelete_payment_method(method_id: int) -> bool:
+    """Асинхронный delete_payment_method"""
+    return await _write(delete_payment_method, method_id)
+
 
+async def atoggle_payment_method(method_id: int) -> Optional[PaymentMethod]:
+    """Асинхронный toggle_payment_method"""
+    return await _write(toggle_payment_method, method_id)
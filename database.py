@@ -1,14 +1,58 @@
 """
 База данных для хранения заказов (SQLite)
+
+Соединения долгоживущие: init_db() открывает одно соединение для записи
+и несколько для чтения, close_db() их закрывает.
+Изменения не коммитятся по одному: фоновая задача собирает их из очереди
+и применяет пачками в одной транзакции (group commit), а каждый вызов
+получает свой результат, когда его пачка зафиксирована.
+PRAGMA (WAL, synchronous и др.) применяются к каждому соединению пула.
+Схема обновляется пошаговыми миграциями по PRAGMA user_version.
 """
+import asyncio
+import logging
 import aiosqlite
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional, List
-from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Optional, List, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
 
 DB_PATH = Path(__file__).resolve().parent / "orders.db"
 
+logger = logging.getLogger(__name__)
+
+_writer: Optional[aiosqlite.Connection] = None
+_pending: Optional[asyncio.Queue] = None
+_committer: Optional[asyncio.Task] = None
+_batch_size = 64
+_batch_delay = 0.0
+_readers: List[aiosqlite.Connection] = []
+_idle_readers: Optional[asyncio.Queue] = None
+
+# Допустимые значения текстовых PRAGMA; числовые приводятся к int
+_PRAGMA_CHOICES = {
+    "journal_mode": {"delete", "truncate", "persist", "memory", "wal", "off"},
+    "synchronous": {"off", "normal", "full", "extra"},
+    "temp_store": {"default", "file", "memory"},
+}
+_INT_PRAGMAS = {"cache_size", "mmap_size", "busy_timeout"}
+
+# Индексы под выборки ниже; порядок сортировки совпадает с индексом,
+# поэтому SQLite не сортирует результат отдельно
+_ORDER_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_orders_user_created ON orders (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at)",
+    "CREATE INDEX IF NOT EXISTS idx_orders_awaiting_confirmation ON orders (created_at) "
+    "WHERE status = 'awaiting_confirmation'",
+)
+_ORDERS_BY_USER_SQL = "SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC"
+_RECENT_ORDERS_SQL = "SELECT * FROM orders ORDER BY created_at DESC LIMIT ?"
+# Условие на статус — литерал: только так SQLite применяет частичный индекс
+_AWAITING_CONFIRMATION_SQL = (
+    "SELECT * FROM orders WHERE status = 'awaiting_confirmation' "
+    "ORDER BY created_at LIMIT ?"
+)
 
 @dataclass
 class Order:
@@ -33,50 +77,291 @@ class Order:
     created_at: str
 
 
-async def init_db():
-    """Инициализация базы данных"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                order_id INTEGER UNIQUE NOT NULL,
-                user_id INTEGER NOT NULL,
-                username TEXT,
-                tariff_id INTEGER NOT NULL,
-                tariff_name TEXT NOT NULL,
-                operator_id INTEGER NOT NULL,
-                operator_name TEXT NOT NULL,
-                monthly_fee INTEGER,
-                connection_price INTEGER NOT NULL,
-                mode TEXT NOT NULL,
-                transfer_phone TEXT,
-                full_name TEXT NOT NULL,
-                region_city TEXT NOT NULL,
-                passport_photo_1 TEXT NOT NULL,
-                passport_photo_2 TEXT NOT NULL,
-                status TEXT NOT NULL DEFAULT 'pending',
-                created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                payment_receipt TEXT,
-                payment_method_name TEXT,
-                payment_confirmed_at TEXT
-            )
-        """)
-        
-        # Миграция: добавляем новые колонки если их нет
-        try:
-            await db.execute("ALTER TABLE orders ADD COLUMN payment_receipt TEXT")
-        except Exception:
-            pass
-        try:
-            await db.execute("ALTER TABLE orders ADD COLUMN payment_method_name TEXT")
-        except Exception:
-            pass
+@dataclass
+class _Mutation:
+    """Изменение в очереди на запись"""
+    sql: str
+    params: Sequence[Any]
+    future: asyncio.Future = field(repr=False)
+
+
+def _pragma_statements(pragmas: Dict[str, object]) -> List[str]:
+    """PRAGMA-запросы; ValueError при неизвестной настройке или значении"""
+    statements = []
+    for name, value in pragmas.items():
+        if name in _INT_PRAGMAS:
+            value = int(value)
+        elif name in _PRAGMA_CHOICES:
+            value = str(value).lower()
+            if value not in _PRAGMA_CHOICES[name]:
+                raise ValueError(f"unsupported {name}: {value}")
+        else:
+            raise ValueError(f"unsupported pragma: {name}")
+        statements.append(f"PRAGMA {name} = {value}")
+    return statements
+
+
+async def _column_exists(db: aiosqlite.Connection, table: str, column: str) -> bool:
+    cursor = await db.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in await cursor.fetchall())
+
+
+async def _add_column(db: aiosqlite.Connection, table: str, column: str, definition: str) -> None:
+    # Базы до миграций могли уже получить колонку старым способом
+    if not await _column_exists(db, table, column):
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+async def _migration_create_orders(db: aiosqlite.Connection) -> None:
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            order_id INTEGER UNIQUE NOT NULL,
+            user_id INTEGER NOT NULL,
+            username TEXT,
+            tariff_id INTEGER NOT NULL,
+            tariff_name TEXT NOT NULL,
+            operator_id INTEGER NOT NULL,
+            operator_name TEXT NOT NULL,
+            monthly_fee INTEGER,
+            connection_price INTEGER NOT NULL,
+            mode TEXT NOT NULL,
+            transfer_phone TEXT,
+            full_name TEXT NOT NULL,
+            region_city TEXT NOT NULL,
+            passport_photo_1 TEXT NOT NULL,
+            passport_photo_2 TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+async def _migration_payment_columns(db: aiosqlite.Connection) -> None:
+    await _add_column(db, "orders", "payment_receipt", "TEXT")
+    await _add_column(db, "orders", "payment_method_name", "TEXT")
+    await _add_column(db, "orders", "payment_confirmed_at", "TEXT")
+
+
+async def _migration_user_regions(db: aiosqlite.Connection) -> None:
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS user_regions (
+            user_id INTEGER PRIMARY KEY,
+            region TEXT NOT NULL,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+async def _migration_order_indexes(db: aiosqlite.Connection) -> None:
+    for statement in _ORDER_INDEXES:
+        await db.execute(statement)
+
+
+# Шаги миграции по порядку; версия схемы = число выполненных шагов
+# (PRAGMA user_version). Новые шаги только дописываются в конец, и каждый
+# должен переживать повторный запуск на базе, где его изменения уже есть.
+_MIGRATIONS = (
+    _migration_create_orders,
+    _migration_payment_columns,
+    _migration_user_regions,
+    _migration_order_indexes,
+)
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+
+async def _schema_version(db: aiosqlite.Connection) -> int:
+    cursor = await db.execute("PRAGMA user_version")
+    return (await cursor.fetchone())[0]
+
+
+async def _migrate(db: aiosqlite.Connection) -> None:
+    """Довести схему до SCHEMA_VERSION одной транзакцией"""
+    if await _schema_version(db) >= SCHEMA_VERSION:
+        return
+
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        # Пока ждали блокировку, базу мог обновить другой процесс
+        version = await _schema_version(db)
+        for migration in _MIGRATIONS[version:]:
+            await migration(db)
+        if version < SCHEMA_VERSION:
+            await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    except BaseException:
+        await db.rollback()
+        raise
+    await db.commit()
+    if version < SCHEMA_VERSION:
+        logger.info("orders.db: схема обновлена с версии %s до %s", version, SCHEMA_VERSION)
+
+
+async def _connect(pragmas: List[str] = ()) -> aiosqlite.Connection:
+    db = await aiosqlite.connect(DB_PATH)
+    db.row_factory = aiosqlite.Row
+    try:
+        for statement in pragmas:
+            await db.execute(statement)
+    except BaseException:
+        await db.close()
+        raise
+    return db
+
+
+@asynccontextmanager
+async def _reading() -> AsyncIterator[aiosqlite.Connection]:
+    """Соединение для чтения из пула (без пула — временное)"""
+    if _idle_readers is None:
+        async with aiosqlite.connect(DB_PATH) as db:
+            db.row_factory = aiosqlite.Row
+            yield db
+        return
+
+    db = await _idle_readers.get()
+    try:
+        yield db
+    finally:
+        _idle_readers.put_nowait(db)
+
+
+async def _collect_batch(queue: asyncio.Queue, first: _Mutation) -> List[Optional[_Mutation]]:
+    """Первое изменение и всё, что накопилось за _batch_delay (не больше _batch_size)"""
+    if _batch_delay > 0 and queue.qsize() < _batch_size - 1:
+        await asyncio.sleep(_batch_delay)
+    batch = [first]
+    while len(batch) < _batch_size and not queue.empty():
+        mutation = queue.get_nowait()
+        batch.append(mutation)
+        if mutation is None:
+            break
+    return batch
+
+
+async def _commit_batch(db: aiosqlite.Connection, batch: List[_Mutation]) -> None:
+    """Выполнить пачку в одной транзакции и раздать результаты"""
+    done = []
+    for mutation in batch:
+        if mutation.future.cancelled():
+            continue
         try:
-            await db.execute("ALTER TABLE orders ADD COLUMN payment_confirmed_at TEXT")
-        except Exception:
-            pass
-        
+            cursor = await db.execute(mutation.sql, mutation.params)
+        except Exception as exc:
+            mutation.future.set_exception(exc)
+            # Ошибка ограничения откатывает только свой запрос. Но при
+            # SQLITE_FULL, IOERR, NOMEM, interrupt SQLite откатывает всю
+            # транзакцию: выполненные до этого изменения потеряны
+            if done and not db.in_transaction:
+                for lost, _ in done:
+                    if not lost.future.done():
+                        lost.future.set_exception(exc)
+                done = []
+        else:
+            done.append((mutation, cursor))
+
+    try:
         await db.commit()
+    except Exception as exc:
+        await db.rollback()
+        for mutation, _ in done:
+            if not mutation.future.done():
+                mutation.future.set_exception(exc)
+        return
+
+    for mutation, cursor in done:
+        if not mutation.future.done():
+            mutation.future.set_result(cursor)
+
+
+async def _commit_loop(queue: asyncio.Queue, db: aiosqlite.Connection) -> None:
+    """Фоновая задача записи: забирает изменения из очереди пачками до None"""
+    while True:
+        first = await queue.get()
+        if first is None:
+            return
+        batch = await _collect_batch(queue, first)
+        stop = batch[-1] is None
+        if stop:
+            batch.pop()
+        try:
+            await _commit_batch(db, batch)
+        except Exception as exc:
+            logger.exception("orders.db: не удалось записать пачку изменений")
+            for mutation in batch:
+                if not mutation.future.done():
+                    mutation.future.set_exception(exc)
+        if stop:
+            return
+
+
+async def _mutate(sql: str, params: Sequence[Any] = ()) -> aiosqlite.Cursor:
+    """Выполнить изменение; возвращает курсор после фиксации транзакции.
+
+    С пулом запрос уходит в очередь group commit, без пула выполняется
+    на временном соединении.
+    """
+    if _pending is None:
+        async with aiosqlite.connect(DB_PATH) as db:
+            cursor = await db.execute(sql, params)
+            await db.commit()
+            return cursor
+
+    future = asyncio.get_running_loop().create_future()
+    _pending.put_nowait(_Mutation(sql, params, future))
+    return await future
+
+
+async def init_db(
+    readers: int = 3,
+    pragmas: Optional[Dict[str, object]] = None,
+    batch_size: int = 64,
+    batch_delay: float = 0.0,
+):
+    """Инициализация базы данных, пула соединений и задачи записи.
+
+    batch_size — сколько изменений максимум в одной транзакции,
+    batch_delay — сколько секунд ждать попутных изменений перед фиксацией
+    (0 — брать только уже накопившиеся в очереди).
+    """
+    global _writer, _pending, _committer, _batch_size, _batch_delay, _idle_readers
+    await close_db()
+
+    statements = _pragma_statements(pragmas or {})
+    db = await _connect(statements)
+    try:
+        await _migrate(db)
+    except BaseException:
+        await db.close()
+        raise
+
+    _writer = db
+    _batch_size = max(batch_size, 1)
+    _batch_delay = max(batch_delay, 0.0)
+    _pending = asyncio.Queue()
+    _committer = asyncio.create_task(_commit_loop(_pending, db))
+    _idle_readers = asyncio.Queue()
+    for _ in range(max(readers, 1)):
+        reader = await _connect(statements)
+        _readers.append(reader)
+        _idle_readers.put_nowait(reader)
+
+
+async def close_db():
+    """Дописать очередь изменений и закрыть соединения пула"""
+    global _writer, _pending, _committer, _idle_readers
+    pending, committer = _pending, _committer
+    # Новые изменения с этого момента идут мимо очереди
+    _pending = None
+    _committer = None
+    if committer is not None:
+        # None в конце очереди: задача записи зафиксирует всё, что было до него
+        pending.put_nowait(None)
+        await committer
+    connections = ([_writer] if _writer is not None else []) + _readers
+    _writer = None
+    _idle_readers = None
+    _readers.clear()
+    for db in connections:
+        await db.close()
 
 
 async def create_order(
@@ -97,31 +382,28 @@ async def create_order(
     passport_photo_2: str,
 ) -> int:
     """Создать новый заказ"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            """
-            INSERT INTO orders (
-                order_id, user_id, username, tariff_id, tariff_name,
-                operator_id, operator_name, monthly_fee, connection_price,
-                mode, transfer_phone, full_name, region_city,
-                passport_photo_1, passport_photo_2, status, created_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', datetime('now'))
-            """,
-            (
-                order_id, user_id, username, tariff_id, tariff_name,
-                operator_id, operator_name, monthly_fee, connection_price,
-                mode, transfer_phone, full_name, region_city,
-                passport_photo_1, passport_photo_2
-            )
+    cursor = await _mutate(
+        """
+        INSERT INTO orders (
+            order_id, user_id, username, tariff_id, tariff_name,
+            operator_id, operator_name, monthly_fee, connection_price,
+            mode, transfer_phone, full_name, region_city,
+            passport_photo_1, passport_photo_2, status, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', datetime('now'))
+        """,
+        (
+            order_id, user_id, username, tariff_id, tariff_name,
+            operator_id, operator_name, monthly_fee, connection_price,
+            mode, transfer_phone, full_name, region_city,
+            passport_photo_1, passport_photo_2
         )
-        await db.commit()
-        return cursor.lastrowid
+    )
+    return cursor.lastrowid
 
 
 async def get_order_by_id(order_id: int) -> Optional[dict]:
     """Получить заказ по ID"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with _reading() as db:
         cursor = await db.execute(
             "SELECT * FROM orders WHERE order_id = ?",
             (order_id,)
@@ -134,35 +416,33 @@ async def get_order_by_id(order_id: int) -> Optional[dict]:
 
 async def update_order_status(order_id: int, status: str) -> bool:
     """Обновить статус заказа"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "UPDATE orders SET status = ? WHERE order_id = ?",
-            (status, order_id)
-        )
-        await db.commit()
-        return cursor.rowcount > 0
+    cursor = await _mutate(
+        "UPDATE orders SET status = ? WHERE order_id = ?",
+        (status, order_id)
+    )
+    return cursor.rowcount > 0
 
 
 async def get_orders_by_user(user_id: int) -> List[dict]:
     """Получить заказы пользователя"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            "SELECT * FROM orders WHERE user_id = ? ORDER BY created_at DESC",
-            (user_id,)
-        )
+    async with _reading() as db:
+        cursor = await db.execute(_ORDERS_BY_USER_SQL, (user_id,))
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
 
 async def get_all_orders(limit: int = 100) -> List[dict]:
     """Получить все заказы (для админа)"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute(
-            "SELECT * FROM orders ORDER BY created_at DESC LIMIT ?",
-            (limit,)
-        )
+    async with _reading() as db:
+        cursor = await db.execute(_RECENT_ORDERS_SQL, (limit,))
+        rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+async def get_orders_awaiting_confirmation(limit: int = 100) -> List[dict]:
+    """Заказы с чеком, ожидающие проверки оплаты (сначала старые)"""
+    async with _reading() as db:
+        cursor = await db.execute(_AWAITING_CONFIRMATION_SQL, (limit,))
         rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
@@ -173,39 +453,61 @@ async def update_order_receipt(
     payment_method_name: str,
 ) -> bool:
     """Сохранить чек оплаты"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            """UPDATE orders 
-               SET payment_receipt = ?, payment_method_name = ?, status = 'awaiting_confirmation'
-               WHERE order_id = ?""",
-            (receipt_file_id, payment_method_name, order_id)
-        )
-        await db.commit()
-        return cursor.rowcount > 0
+    cursor = await _mutate(
+        """UPDATE orders 
+           SET payment_receipt = ?, payment_method_name = ?, status = 'awaiting_confirmation'
+           WHERE order_id = ?""",
+        (receipt_file_id, payment_method_name, order_id)
+    )
+    return cursor.rowcount > 0
 
 
 async def confirm_order_payment(order_id: int) -> bool:
     """Подтвердить оплату заказа"""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            """UPDATE orders 
-               SET status = 'paid', payment_confirmed_at = datetime('now')
-               WHERE order_id = ?""",
-            (order_id,)
-        )
-        await db.commit()
-        return cursor.rowcount > 0
+    cursor = await _mutate(
+        """UPDATE orders 
+           SET status = 'paid', payment_confirmed_at = datetime('now')
+           WHERE order_id = ?""",
+        (order_id,)
+    )
+    return cursor.rowcount > 0
 
 
 async def reject_order_payment(order_id: int) -> bool:
     """Отклонить оплату заказа"""
-    async with aiosqlite.connect(DB_PATH) as db:
+    cursor = await _mutate(
+        """UPDATE orders 
+           SET status = 'payment_rejected', payment_receipt = NULL
+           WHERE order_id = ?""",
+        (order_id,)
+    )
+    return cursor.rowcount > 0
+
+
+async def get_user_region(user_id: int) -> Optional[str]:
+    """Регион, выбранный пользователем (None — не выбран).
+
+    Читаем из таблицы на каждый вызов: поиск по первичному ключу дешёвый,
+    а кэш в памяти не видел бы изменений из других процессов.
+    """
+    async with _reading() as db:
         cursor = await db.execute(
-            """UPDATE orders 
-               SET status = 'payment_rejected', payment_receipt = NULL
-               WHERE order_id = ?""",
-            (order_id,)
+            "SELECT region FROM user_regions WHERE user_id = ?",
+            (user_id,)
         )
-        await db.commit()
-        return cursor.rowcount > 0
+        row = await cursor.fetchone()
+    return row[0] if row else None
 
+
+async def set_user_region(user_id: int, region: Optional[str]) -> None:
+    """Запомнить регион пользователя (None — показывать тарифы всех регионов)"""
+    if region is None:
+        await _mutate("DELETE FROM user_regions WHERE user_id = ?", (user_id,))
+    else:
+        await _mutate(
+            """INSERT INTO user_regions (user_id, region, updated_at)
+               VALUES (?, ?, datetime('now'))
+               ON CONFLICT(user_id) DO UPDATE
+               SET region = excluded.region, updated_at = excluded.updated_at""",
+            (user_id, region)
+        )
@@ -5,6 +5,9 @@ from aiogram import Router
 
 from .start import router as start_router
 from .tariffs import router as tariffs_router
+from .search import router as search_router
+from .inline import router as inline_router
+from .recommend import router as recommend_router
 from .orders import router as orders_router
 from .payments import router as payments_router
 from .faq import router as faq_router
@@ -16,6 +19,9 @@ def setup_routers() -> Router:
     router = Router()
     router.include_router(start_router)
     router.include_router(tariffs_router)
+    router.include_router(search_router)
+    router.include_router(inline_router)
+    router.include_router(recommend_router)
     router.include_router(orders_router)
     router.include_router(payments_router)
     router.include_router(faq_router)
@@ -1,31 +1,43 @@
 """
 Админ-меню для управления операторами и тарифами
 """
-from aiogram import Router, F
+import asyncio
+import csv
+import json
+import time
+
+from aiogram import Router, F, Bot
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import Message, CallbackQuery, BufferedInputFile
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from config import load_config
 from data.tariffs import (
-    add_operator,
-    add_tariff,
-    delete_operator,
-    delete_tariff,
-    get_all_operators,
-    get_operator_by_id,
-    get_tariff_by_id,
-    get_tariffs_by_operator,
-    toggle_tariff_visibility,
-    update_tariff,
+    aadd_operator,
+    aadd_tariff,
+    adelete_operator,
+    adelete_tariff,
+    aget_all_operators,
+    aget_operator_by_id,
+    aget_tariff_by_id,
+    aget_tariffs_by_operator,
+    aget_tariffs_page,
+    arender_tariff,
+    atoggle_tariff_visibility,
+    aupdate_tariff,
     # Payment methods
-    get_all_payment_methods,
-    get_payment_method_by_id,
-    add_payment_method,
-    update_payment_method,
-    delete_payment_method,
-    toggle_payment_method,
+    aget_all_payment_methods,
+    aget_payment_method_by_id,
+    aadd_payment_method,
+    aupdate_payment_method,
+    adelete_payment_method,
+    atoggle_payment_method,
+    # Bulk import
+    abulk_upsert_tariffs,
+    abulk_update_tariffs,
+    catalog_actor,
+    format_tariff_admin_info,
 )
 from keyboards.admin_kb import (
     admin_main_kb,
@@ -36,10 +48,25 @@ from keyboards.admin_kb import (
     admin_tariff_actions_kb,
     admin_tariff_edit_kb,
     admin_tariff_visibility_kb,
+    admin_price_rule_confirm_kb,
     # Payment methods
     admin_payment_methods_kb,
     admin_payment_method_actions_kb,
     admin_payment_method_edit_kb,
+    # Catalog import/export
+    admin_catalog_io_kb,
+)
+from utils.price_rules import (
+    changes_to_fields,
+    compute_price_changes,
+    parse_price_rule,
+)
+from utils.catalog_io import (
+    CSV_COLUMNS,
+    CatalogImportError,
+    export_tariffs_csv,
+    export_tariffs_json,
+    parse_tariffs_document,
 )
 
 router = Router()
@@ -57,31 +84,36 @@ class AdminStates(StatesGroup):
     editing_tariff_description = State()
     editing_tariff_monthly_fee = State()
     editing_tariff_connection_price = State()
+    editing_tariff_regions = State()
+    waiting_price_rule = State()
     # Payment methods
     waiting_payment_method_name = State()
     waiting_payment_method_details = State()
     editing_payment_method_name = State()
     editing_payment_method_details = State()
+    # Catalog import
+    waiting_catalog_document = State()
 
 
 def _is_admin(user_id: int) -> bool:
     return user_id in config.bot.admin_ids
 
 
-def _render_tariff_admin_text(tariff) -> str:
-    operator = get_operator_by_id(tariff.operator_id)
-    operator_name = operator.name if operator else "Не указан"
-    status = "Публичный" if tariff.is_public else "Скрытый"
-    monthly_fee = f"{tariff.monthly_fee} ₽/мес" if tariff.monthly_fee else "не указана"
+async def _catalog_actor_middleware(handler, event, data):
+    """Изменения каталога из админ-хендлеров пишутся в журнал с ID администратора"""
+    user = getattr(event, "from_user", None)
+    with catalog_actor(user.id if user else None):
+        return await handler(event, data)
 
-    return (
-        f"<b>Тариф:</b> {tariff.name}\n"
-        f"<b>Оператор:</b> {operator_name}\n"
-        f"<b>Статус:</b> {status}\n"
-        f"<b>Абонплата:</b> {monthly_fee}\n"
-        f"<b>Стоимость подключения:</b> {tariff.connection_price} ₽\n\n"
-        f"<b>Описание:</b>\n{tariff.description}"
-    )
+
+router.message.middleware(_catalog_actor_middleware)
+router.callback_query.middleware(_catalog_actor_middleware)
+
+
+async def _render_tariff_admin_text(tariff) -> str:
+    text = await arender_tariff(tariff.id, admin=True)
+    # Тариф мог быть удалён между чтениями — рисуем по имеющейся записи
+    return text if text is not None else format_tariff_admin_info(tariff)
 
 
 @router.message(Command("admin"))
@@ -121,7 +153,7 @@ async def admin_show_operators(callback: CallbackQuery):
         await callback.answer("Нет доступа", show_alert=True)
         return
 
-    operators = get_all_operators()
+    operators = await aget_all_operators()
     await callback.message.edit_text(
         "<b>🏷️ Операторы</b>\n\nВыберите оператора:",
         reply_markup=admin_operators_kb(operators),
@@ -156,10 +188,10 @@ async def admin_save_operator(message: Message, state: FSMContext):
         await message.answer("Название не может быть пустым.")
         return
 
-    add_operator(name)
+    await aadd_operator(name)
     await state.clear()
 
-    operators = get_all_operators()
+    operators = await aget_all_operators()
     await message.answer(
         "Оператор добавлен.\n\n<b>🏷️ Операторы</b>",
         reply_markup=admin_operators_kb(operators),
@@ -175,7 +207,7 @@ async def admin_operator_details(callback: CallbackQuery):
         return
 
     operator_id = int(callback.data.split(":")[2])
-    operator = get_operator_by_id(operator_id)
+    operator = await aget_operator_by_id(operator_id)
     if not operator:
         await callback.answer("Оператор не найден", show_alert=True)
         return
@@ -196,9 +228,9 @@ async def admin_delete_operator(callback: CallbackQuery):
         return
 
     operator_id = int(callback.data.split(":")[2])
-    delete_operator(operator_id)
+    await adelete_operator(operator_id)
 
-    operators = get_all_operators()
+    operators = await aget_all_operators()
     await callback.message.edit_text(
         "Оператор удалён.\n\n<b>🏷️ Операторы</b>",
         reply_markup=admin_operators_kb(operators),
@@ -214,7 +246,7 @@ async def admin_tariffs_choose_operator(callback: CallbackQuery):
         await callback.answer("Нет доступа", show_alert=True)
         return
 
-    operators = get_all_operators()
+    operators = await aget_all_operators()
     await callback.message.edit_text(
         "<b>📦 Тарифы</b>\n\nВыберите оператора:",
         reply_markup=admin_tariffs_operators_kb(operators),
@@ -224,22 +256,27 @@ async def admin_tariffs_choose_operator(callback: CallbackQuery):
 
 
 @router.callback_query(F.data.startswith("admin:tariffs_operator:"))
-async def admin_show_tariffs(callback: CallbackQuery):
+async def admin_show_tariffs(callback: CallbackQuery, state: FSMContext):
     """Список тарифов оператора"""
     if not _is_admin(callback.from_user.id):
         await callback.answer("Нет доступа", show_alert=True)
         return
 
-    operator_id = int(callback.data.split(":")[2])
-    operator = get_operator_by_id(operator_id)
+    # Сюда ведут и «Отмена» незавершённых действий (например, изменения цен)
+    await state.clear()
+    # admin:tariffs_operator:{id}[:{страница}]
+    parts = callback.data.split(":")
+    operator_id = int(parts[2])
+    page = int(parts[3]) if len(parts) > 3 else 0
+    operator = await aget_operator_by_id(operator_id)
     if not operator:
         await callback.answer("Оператор не найден", show_alert=True)
         return
 
-    tariffs = get_tariffs_by_operator(operator_id, include_hidden=True)
+    tariffs, page, pages = await aget_tariffs_page(operator_id, page, include_hidden=True)
     await callback.message.edit_text(
         f"<b>📦 Тарифы оператора {operator.name}</b>",
-        reply_markup=admin_tariffs_kb(operator_id, tariffs),
+        reply_markup=admin_tariffs_kb(operator_id, tariffs, page, pages),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -253,7 +290,7 @@ async def admin_add_tariff(callback: CallbackQuery, state: FSMContext):
         return
 
     operator_id = int(callback.data.split(":")[2])
-    operator = get_operator_by_id(operator_id)
+    operator = await aget_operator_by_id(operator_id)
     if not operator:
         await callback.answer("Оператор не найден", show_alert=True)
         return
@@ -368,7 +405,7 @@ async def admin_finish_tariff(callback: CallbackQuery, state: FSMContext):
         return
 
     is_public = callback.data.split(":")[2] == "1"
-    add_tariff(
+    await aadd_tariff(
         operator_id=operator_id,
         name=name,
         description=description,
@@ -379,10 +416,10 @@ async def admin_finish_tariff(callback: CallbackQuery, state: FSMContext):
 
     await state.clear()
 
-    tariffs = get_tariffs_by_operator(operator_id, include_hidden=True)
+    tariffs, page, pages = await aget_tariffs_page(operator_id, 0, include_hidden=True)
     await callback.message.edit_text(
         "Тариф добавлен.",
-        reply_markup=admin_tariffs_kb(operator_id, tariffs),
+        reply_markup=admin_tariffs_kb(operator_id, tariffs, page, pages),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -396,12 +433,12 @@ async def admin_tariff_details(callback: CallbackQuery):
         return
 
     tariff_id = int(callback.data.split(":")[2])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
 
-    text = _render_tariff_admin_text(tariff)
+    text = await _render_tariff_admin_text(tariff)
     await callback.message.edit_text(
         text,
         reply_markup=admin_tariff_actions_kb(tariff_id, tariff.operator_id, tariff.is_public),
@@ -419,12 +456,12 @@ async def admin_tariff_edit_menu(callback: CallbackQuery, state: FSMContext):
 
     await state.clear()
     tariff_id = int(callback.data.split(":")[2])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
 
-    text = _render_tariff_admin_text(tariff)
+    text = await _render_tariff_admin_text(tariff)
     await callback.message.edit_text(
         f"{text}\n\nВыберите, что изменить:",
         reply_markup=admin_tariff_edit_kb(tariff_id),
@@ -441,7 +478,7 @@ async def admin_tariff_edit_name(callback: CallbackQuery, state: FSMContext):
         return
 
     tariff_id = int(callback.data.split(":")[2])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
@@ -463,7 +500,7 @@ async def admin_tariff_edit_description(callback: CallbackQuery, state: FSMConte
         return
 
     tariff_id = int(callback.data.split(":")[2])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
@@ -485,7 +522,7 @@ async def admin_tariff_edit_monthly_fee(callback: CallbackQuery, state: FSMConte
         return
 
     tariff_id = int(callback.data.split(":")[2])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
@@ -507,7 +544,7 @@ async def admin_tariff_edit_price(callback: CallbackQuery, state: FSMContext):
         return
 
     tariff_id = int(callback.data.split(":")[2])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
@@ -521,6 +558,31 @@ async def admin_tariff_edit_price(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("admin:tariff_edit_regions:"))
+async def admin_tariff_edit_regions(callback: CallbackQuery, state: FSMContext):
+    """Редактирование регионов тарифа"""
+    if not _is_admin(callback.from_user.id):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    tariff_id = int(callback.data.split(":")[2])
+    tariff = await aget_tariff_by_id(tariff_id)
+    if not tariff:
+        await callback.answer("Тариф не найден", show_alert=True)
+        return
+
+    current = ", ".join(tariff.regions) if tariff.regions else "все"
+    await state.update_data(edit_tariff_id=tariff_id)
+    await state.set_state(AdminStates.editing_tariff_regions)
+    await callback.message.edit_text(
+        f"Текущие регионы: <b>{current}</b>\n\n"
+        "Введите регионы через запятую (например: Москва, Московская область) "
+        "или <code>-</code>, если тариф доступен во всех регионах:",
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
 @router.message(AdminStates.editing_tariff_name)
 async def admin_apply_tariff_name(message: Message, state: FSMContext):
     """Сохранение нового названия"""
@@ -539,7 +601,7 @@ async def admin_apply_tariff_name(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    tariff = update_tariff(tariff_id, name=name)
+    tariff = await aupdate_tariff(tariff_id, name=name)
     if not tariff:
         await message.answer("Тариф не найден. Откройте /admin заново.")
         await state.clear()
@@ -547,7 +609,7 @@ async def admin_apply_tariff_name(message: Message, state: FSMContext):
 
     await state.clear()
     await message.answer(
-        _render_tariff_admin_text(tariff),
+        await _render_tariff_admin_text(tariff),
         reply_markup=admin_tariff_actions_kb(tariff.id, tariff.operator_id, tariff.is_public),
         parse_mode="HTML"
     )
@@ -571,7 +633,7 @@ async def admin_apply_tariff_description(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    tariff = update_tariff(tariff_id, description=description)
+    tariff = await aupdate_tariff(tariff_id, description=description)
     if not tariff:
         await message.answer("Тариф не найден. Откройте /admin заново.")
         await state.clear()
@@ -579,7 +641,7 @@ async def admin_apply_tariff_description(message: Message, state: FSMContext):
 
     await state.clear()
     await message.answer(
-        _render_tariff_admin_text(tariff),
+        await _render_tariff_admin_text(tariff),
         reply_markup=admin_tariff_actions_kb(tariff.id, tariff.operator_id, tariff.is_public),
         parse_mode="HTML"
     )
@@ -606,7 +668,7 @@ async def admin_apply_tariff_monthly_fee(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    tariff = update_tariff(tariff_id, monthly_fee=monthly_fee_value)
+    tariff = await aupdate_tariff(tariff_id, monthly_fee=monthly_fee_value)
     if not tariff:
         await message.answer("Тариф не найден. Откройте /admin заново.")
         await state.clear()
@@ -614,7 +676,7 @@ async def admin_apply_tariff_monthly_fee(message: Message, state: FSMContext):
 
     await state.clear()
     await message.answer(
-        _render_tariff_admin_text(tariff),
+        await _render_tariff_admin_text(tariff),
         reply_markup=admin_tariff_actions_kb(tariff.id, tariff.operator_id, tariff.is_public),
         parse_mode="HTML"
     )
@@ -639,7 +701,40 @@ async def admin_apply_tariff_connection_price(message: Message, state: FSMContex
         await state.clear()
         return
 
-    tariff = update_tariff(tariff_id, connection_price=connection_price)
+    tariff = await aupdate_tariff(tariff_id, connection_price=connection_price)
+    if not tariff:
+        await message.answer("Тариф не найден. Откройте /admin заново.")
+        await state.clear()
+        return
+
+    await state.clear()
+    await message.answer(
+        await _render_tariff_admin_text(tariff),
+        reply_markup=admin_tariff_actions_kb(tariff.id, tariff.operator_id, tariff.is_public),
+        parse_mode="HTML"
+    )
+
+
+@router.message(AdminStates.editing_tariff_regions)
+async def admin_apply_tariff_regions(message: Message, state: FSMContext):
+    """Сохранение регионов тарифа"""
+    if not _is_admin(message.from_user.id):
+        return
+
+    value = (message.text or "").strip()
+    if not value:
+        await message.answer("Введите регионы через запятую или «-».")
+        return
+    regions = [] if value == "-" else value.split(",")
+
+    data = await state.get_data()
+    tariff_id = data.get("edit_tariff_id")
+    if not tariff_id:
+        await message.answer("Тариф не найден. Откройте /admin заново.")
+        await state.clear()
+        return
+
+    tariff = await aupdate_tariff(tariff_id, regions=regions)
     if not tariff:
         await message.answer("Тариф не найден. Откройте /admin заново.")
         await state.clear()
@@ -647,7 +742,7 @@ async def admin_apply_tariff_connection_price(message: Message, state: FSMContex
 
     await state.clear()
     await message.answer(
-        _render_tariff_admin_text(tariff),
+        await _render_tariff_admin_text(tariff),
         reply_markup=admin_tariff_actions_kb(tariff.id, tariff.operator_id, tariff.is_public),
         parse_mode="HTML"
     )
@@ -661,12 +756,12 @@ async def admin_tariff_toggle(callback: CallbackQuery):
         return
 
     tariff_id = int(callback.data.split(":")[2])
-    tariff = toggle_tariff_visibility(tariff_id)
+    tariff = await atoggle_tariff_visibility(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
 
-    text = _render_tariff_admin_text(tariff)
+    text = await _render_tariff_admin_text(tariff)
     await callback.message.edit_text(
         text,
         reply_markup=admin_tariff_actions_kb(tariff_id, tariff.operator_id, tariff.is_public),
@@ -683,21 +778,290 @@ async def admin_tariff_delete(callback: CallbackQuery):
         return
 
     tariff_id = int(callback.data.split(":")[2])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
 
-    delete_tariff(tariff_id)
-    tariffs = get_tariffs_by_operator(tariff.operator_id, include_hidden=True)
+    await adelete_tariff(tariff_id)
+    tariffs, page, pages = await aget_tariffs_page(tariff.operator_id, 0, include_hidden=True)
     await callback.message.edit_text(
         "Тариф удалён.",
-        reply_markup=admin_tariffs_kb(tariff.operator_id, tariffs),
+        reply_markup=admin_tariffs_kb(tariff.operator_id, tariffs, page, pages),
         parse_mode="HTML"
     )
     await callback.answer()
 
 
+# ============== Bulk Price Changes ==============
+
+_PRICE_PREVIEW_LIMIT = 30
+
+
+def _format_price(value) -> str:
+    return f"{value:,} ₽" if value is not None else "—"
+
+
+@router.callback_query(F.data.startswith("admin:price_rule:"))
+async def admin_price_rule(callback: CallbackQuery, state: FSMContext):
+    """Запрос правила массового изменения цен"""
+    if not _is_admin(callback.from_user.id):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    operator_id = int(callback.data.split(":")[2])
+    operator = await aget_operator_by_id(operator_id)
+    if not operator:
+        await callback.answer("Оператор не найден", show_alert=True)
+        return
+
+    await state.update_data(price_rule_operator_id=operator_id)
+    await state.set_state(AdminStates.waiting_price_rule)
+    await callback.message.edit_text(
+        f"<b>💱 Изменение цен: {operator.name}</b>\n\n"
+        "Отправьте правило: <code>поле изменение [публичные|скрытые|все]</code>\n\n"
+        "Примеры:\n"
+        "<code>подключение +10%</code>\n"
+        "<code>абонплата -50 скрытые</code>\n"
+        "<code>абонплата =500 публичные</code>\n\n"
+        "Перед записью будет показан список изменений.",
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@router.message(AdminStates.waiting_price_rule)
+async def admin_price_rule_preview(message: Message, state: FSMContext):
+    """Предпросмотр изменения цен"""
+    if not _is_admin(message.from_user.id):
+        return
+
+    data = await state.get_data()
+    operator_id = data.get("price_rule_operator_id")
+    if not operator_id:
+        await message.answer("Оператор не найден. Откройте /admin заново.")
+        await state.clear()
+        return
+
+    try:
+        rule = parse_price_rule(message.text or "")
+    except ValueError as exc:
+        await message.answer(f"Не удалось разобрать правило: {exc}.")
+        return
+
+    tariffs = await aget_tariffs_by_operator(operator_id, include_hidden=True)
+    changes = compute_price_changes(tariffs, rule)
+    if not changes:
+        await message.answer(
+            f"{rule.describe()}\n\nНи один тариф не изменится. Отправьте другое правило."
+        )
+        return
+
+    await state.update_data(price_rule_text=message.text)
+    lines = [f"<b>💱 {rule.describe()}</b>", "", f"Изменится тарифов: {len(changes)}", ""]
+    for change in changes[:_PRICE_PREVIEW_LIMIT]:
+        lines.append(
+            f"• {change.tariff.name}: {_format_price(change.old)} → {_format_price(change.new)}"
+        )
+    if len(changes) > _PRICE_PREVIEW_LIMIT:
+        lines.append(f"… и ещё {len(changes) - _PRICE_PREVIEW_LIMIT}")
+    lines.extend(["", "Применить? Можно отправить другое правило."])
+
+    await message.answer(
+        "\n".join(lines),
+        reply_markup=admin_price_rule_confirm_kb(operator_id),
+        parse_mode="HTML"
+    )
+
+
+@router.callback_query(F.data == "admin:price_rule_apply")
+async def admin_price_rule_apply(callback: CallbackQuery, state: FSMContext):
+    """Применить изменение цен одной записью"""
+    if not _is_admin(callback.from_user.id):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    data = await state.get_data()
+    operator_id = data.get("price_rule_operator_id")
+    rule_text = data.get("price_rule_text")
+    if not operator_id or not rule_text:
+        await callback.answer("Правило не найдено", show_alert=True)
+        return
+
+    # Пересчитываем по текущим ценам: каталог мог измениться после предпросмотра
+    rule = parse_price_rule(rule_text)
+    tariffs = await aget_tariffs_by_operator(operator_id, include_hidden=True)
+    changes = compute_price_changes(tariffs, rule)
+    updated = await abulk_update_tariffs(changes_to_fields(changes, rule))
+    await state.clear()
+
+    tariffs, page, pages = await aget_tariffs_page(operator_id, 0, include_hidden=True)
+    await callback.message.edit_text(
+        f"✅ Цены обновлены: {updated} тариф(ов).",
+        reply_markup=admin_tariffs_kb(operator_id, tariffs, page, pages),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+# ============== Catalog Import/Export Handlers ==============
+
+_IMPORT_MAX_SIZE = 20 * 1024 * 1024  # Лимит скачивания файлов Bot API
+_IMPORT_MAX_ERRORS = 20
+
+
+@router.callback_query(F.data == "admin:catalog_io")
+async def admin_catalog_io(callback: CallbackQuery, state: FSMContext):
+    """Меню импорта/экспорта каталога"""
+    if not _is_admin(callback.from_user.id):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    await state.clear()
+    await callback.message.edit_text(
+        "<b>📥 Импорт / экспорт тарифов</b>\n\n"
+        "Экспорт выгружает все тарифы (включая скрытые) файлом.\n"
+        "Импорт добавляет новые тарифы и обновляет существующие "
+        "(совпадение по оператору и названию) одной записью.",
+        reply_markup=admin_catalog_io_kb(),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("admin:catalog_export:"))
+async def admin_catalog_export(callback: CallbackQuery):
+    """Выгрузка каталога в CSV/JSON"""
+    if not _is_admin(callback.from_user.id):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    export_format = callback.data.split(":")[2]
+    started = time.perf_counter()
+    operators = await aget_all_operators()
+    tariffs = {
+        operator.id: await aget_tariffs_by_operator(operator.id, include_hidden=True)
+        for operator in operators
+    }
+    if export_format == "json":
+        content = export_tariffs_json(operators, tariffs)
+    else:
+        export_format = "csv"
+        content = export_tariffs_csv(operators, tariffs)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    total = sum(len(items) for items in tariffs.values())
+    await callback.message.answer_document(
+        BufferedInputFile(content, filename=f"tariffs.{export_format}"),
+        caption=f"📤 Тарифов: {total}\n⏱️ Подготовка файла: {elapsed_ms:.0f} мс",
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data == "admin:catalog_import")
+async def admin_catalog_import(callback: CallbackQuery, state: FSMContext):
+    """Запрос файла для импорта"""
+    if not _is_admin(callback.from_user.id):
+        await callback.answer("Нет доступа", show_alert=True)
+        return
+
+    await state.set_state(AdminStates.waiting_catalog_document)
+    await callback.message.edit_text(
+        "Отправьте файл <b>.csv</b> или <b>.json</b> с тарифами.\n\n"
+        f"Колонки CSV: <code>{', '.join(CSV_COLUMNS)}</code>\n"
+        "• operator — название оператора (или колонка operator_id)\n"
+        "• monthly_fee — пусто или 0, если абонплата не показывается\n"
+        "• is_public — 1/0 (новые тарифы по умолчанию публичные)\n"
+        "• regions — регионы через «;», пусто — все регионы\n\n"
+        "Обязательны operator и name, для новых тарифов — connection_price. "
+        "Колонки, которых нет в файле, у существующих тарифов не меняются.\n\n"
+        "Формат JSON — как в экспорте.",
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+def _describe_import_read_error(exc: Exception) -> str:
+    """Понятное описание ошибки чтения файла импорта"""
+    if isinstance(exc, UnicodeDecodeError):
+        return "файл должен быть в кодировке UTF-8"
+    if isinstance(exc, json.JSONDecodeError):
+        return f"ошибка JSON в строке {exc.lineno}, столбце {exc.colno}: {exc.msg}"
+    if isinstance(exc, csv.Error):
+        return f"некорректный CSV: {exc}"
+    return str(exc)
+
+
+@router.message(AdminStates.waiting_catalog_document)
+async def admin_catalog_import_document(message: Message, state: FSMContext, bot: Bot):
+    """Импорт тарифов из файла"""
+    if not _is_admin(message.from_user.id):
+        return
+
+    document = message.document
+    filename = (document.file_name or "") if document else ""
+    if not filename.lower().endswith((".csv", ".json")):
+        await message.answer("Отправьте файл с расширением .csv или .json.")
+        return
+    if document.file_size and document.file_size > _IMPORT_MAX_SIZE:
+        await message.answer("Файл слишком большой (максимум 20 МБ).")
+        return
+
+    started = time.perf_counter()
+    buffer = await bot.download(document)
+    downloaded = time.perf_counter()
+
+    operators = await aget_all_operators()
+    try:
+        rows = await asyncio.to_thread(
+            parse_tariffs_document, filename, buffer.read(), operators
+        )
+    except CatalogImportError as exc:
+        errors = exc.errors[:_IMPORT_MAX_ERRORS]
+        more = len(exc.errors) - len(errors)
+        text = "❌ Файл не импортирован:\n\n" + "\n".join(errors)
+        if more > 0:
+            text += f"\n… и ещё ошибок: {more}"
+        await message.answer(text, parse_mode=None)
+        return
+    except (ValueError, csv.Error) as exc:
+        # UnicodeDecodeError и JSONDecodeError — тоже ValueError
+        await message.answer(
+            f"❌ Не удалось прочитать файл: {_describe_import_read_error(exc)}",
+            parse_mode=None,
+        )
+        return
+    parsed = time.perf_counter()
+
+    try:
+        result = await abulk_upsert_tariffs(rows)
+    except ValueError as exc:
+        # Например, оператор удалён после проверки файла
+        # или у нового тарифа нет connection_price
+        await message.answer(
+            f"❌ Файл не импортирован, каталог не изменён: {exc}\n\n"
+            "Проверьте, что операторы из файла существуют, а у новых тарифов "
+            "заполнена connection_price.",
+            parse_mode=None,
+        )
+        return
+    applied = time.perf_counter()
+    await state.clear()
+
+    await message.answer(
+        "✅ <b>Импорт завершён</b>\n\n"
+        f"Строк в файле: {len(rows)}\n"
+        f"Добавлено: {result['added']}\n"
+        f"Обновлено: {result['updated']}\n"
+        f"Без изменений: {result['unchanged']}\n\n"
+        f"⏱️ Загрузка: {(downloaded - started) * 1000:.0f} мс, "
+        f"проверка: {(parsed - downloaded) * 1000:.0f} мс, "
+        f"запись: {(applied - parsed) * 1000:.0f} мс",
+        reply_markup=admin_catalog_io_kb(),
+        parse_mode="HTML"
+    )
+
+
 # ============== Payment Methods Handlers ==============
 
 def _render_payment_method_text(method) -> str:
@@ -718,7 +1082,7 @@ async def admin_show_payment_methods(callback: CallbackQuery, state: FSMContext)
         return
 
     await state.clear()
-    methods = get_all_payment_methods()
+    methods = await aget_all_payment_methods()
     await callback.message.edit_text(
         "<b>💳 Способы оплаты</b>\n\nВыберите способ оплаты для настройки:",
         reply_markup=admin_payment_methods_kb(methods),
@@ -784,10 +1148,10 @@ async def admin_save_payment_method_details(message: Message, state: FSMContext)
         await state.clear()
         return
 
-    add_payment_method(name=name, details=details)
+    await aadd_payment_method(name=name, details=details)
     await state.clear()
 
-    methods = get_all_payment_methods()
+    methods = await aget_all_payment_methods()
     await message.answer(
         "✅ Способ оплаты добавлен.\n\n<b>💳 Способы оплаты</b>",
         reply_markup=admin_payment_methods_kb(methods),
@@ -803,7 +1167,7 @@ async def admin_payment_method_details(callback: CallbackQuery):
         return
 
     method_id = int(callback.data.split(":")[2])
-    method = get_payment_method_by_id(method_id)
+    method = await aget_payment_method_by_id(method_id)
     if not method:
         await callback.answer("Способ оплаты не найден", show_alert=True)
         return
@@ -825,7 +1189,7 @@ async def admin_toggle_payment_method(callback: CallbackQuery):
         return
 
     method_id = int(callback.data.split(":")[2])
-    method = toggle_payment_method(method_id)
+    method = await atoggle_payment_method(method_id)
     if not method:
         await callback.answer("Способ оплаты не найден", show_alert=True)
         return
@@ -847,9 +1211,9 @@ async def admin_delete_payment_method(callback: CallbackQuery):
         return
 
     method_id = int(callback.data.split(":")[2])
-    delete_payment_method(method_id)
+    await adelete_payment_method(method_id)
 
-    methods = get_all_payment_methods()
+    methods = await aget_all_payment_methods()
     await callback.message.edit_text(
         "🗑️ Способ оплаты удалён.\n\n<b>💳 Способы оплаты</b>",
         reply_markup=admin_payment_methods_kb(methods),
@@ -867,7 +1231,7 @@ async def admin_payment_method_edit_menu(callback: CallbackQuery, state: FSMCont
 
     await state.clear()
     method_id = int(callback.data.split(":")[2])
-    method = get_payment_method_by_id(method_id)
+    method = await aget_payment_method_by_id(method_id)
     if not method:
         await callback.answer("Способ оплаты не найден", show_alert=True)
         return
@@ -889,7 +1253,7 @@ async def admin_payment_method_edit_name(callback: CallbackQuery, state: FSMCont
         return
 
     method_id = int(callback.data.split(":")[2])
-    method = get_payment_method_by_id(method_id)
+    method = await aget_payment_method_by_id(method_id)
     if not method:
         await callback.answer("Способ оплаты не найден", show_alert=True)
         return
@@ -921,7 +1285,7 @@ async def admin_apply_payment_method_name(message: Message, state: FSMContext):
         await state.clear()
         return
 
-    method = update_payment_method(method_id, name=name)
+    method = await aupdate_payment_method(method_id, name=name)
     if not method:
         await message.answer("Способ оплаты не найден. Откройте /admin заново.")
         await state.clear()
@@ -943,7 +1307,7 @@ async def admin_payment_method_edit_details(callback: CallbackQuery, state: FSMC
         return
 
     method_id = int(callback.data.split(":")[2])
-    method = get_payment_method_by_id(method_id)
+    method = await aget_payment_method_by_id(method_id)
     if not method:
         await callback.answer("Способ оплаты не найден", show_alert=True)
         return
@@ -975,7 +1339,7 @@ async def admin_apply_payment_method_details(message: Message, state: FSMContext
         await state.clear()
         return
 
-    method = update_payment_method(method_id, details=details)
+    method = await aupdate_payment_method(method_id, details=details)
     if not method:
         await message.answer("Способ оплаты не найден. Откройте /admin заново.")
         await state.clear()
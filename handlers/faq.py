@@ -1,8 +1,11 @@
 """
 Обработчик FAQ
 """
+from functools import lru_cache
+
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
+from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
@@ -37,6 +40,7 @@ FAQ_ITEMS = {
 }
 
 
+@lru_cache(maxsize=None)
 def faq_menu_kb() -> InlineKeyboardMarkup:
     """Клавиатура FAQ"""
     builder = InlineKeyboardBuilder()
@@ -50,6 +54,7 @@ def faq_menu_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+@lru_cache(maxsize=None)
 def faq_back_kb() -> InlineKeyboardMarkup:
     """Кнопка возврата к FAQ"""
     builder = InlineKeyboardBuilder()
@@ -63,8 +68,9 @@ def faq_back_kb() -> InlineKeyboardMarkup:
 
 
 @router.message(F.text == "❓ FAQ")
-async def show_faq(message: Message):
-    """Показать меню FAQ"""
+async def show_faq(message: Message, state: FSMContext):
+    """Показать меню FAQ (кнопка меню завершает поиск, подбор и т.п.)"""
+    await state.clear()
     await message.answer(
         "<b>❓ Часто задаваемые вопросы</b>\n\n"
         "Выберите интересующий вопрос:",
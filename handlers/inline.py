@@ -0,0 +1,59 @@
+"""
+Inline-режим: поиск тарифов из любого чата (@бот запрос)
+"""
+from aiogram import Router, Bot
+from aiogram.types import (
+    InlineQuery,
+    InlineQueryResultArticle,
+    InlineQueryResultsButton,
+    InputTextMessageContent,
+)
+
+from keyboards.main_kb import tariff_link_kb
+from data.tariffs import aget_all_operators, arender_tariff, asearch_tariffs
+
+router = Router()
+
+# Telegram показывает не больше 50 результатов за ответ
+_RESULTS_PER_PAGE = 50
+# Секунды, которые Telegram кэширует ответ на одинаковый запрос
+_CACHE_TIME = 60
+
+TARIFF_DEEP_LINK_PREFIX = "tariff_"
+
+
+@router.inline_query()
+async def inline_tariffs(inline_query: InlineQuery, bot: Bot):
+    """Найденные тарифы как карточки для отправки в чат"""
+    query = inline_query.query.strip()
+    offset = int(inline_query.offset) if inline_query.offset.isdigit() else 0
+    tariffs = await asearch_tariffs(query, limit=_RESULTS_PER_PAGE, offset=offset) if query else []
+
+    me = await bot.me()
+    operator_names = {operator.id: operator.name for operator in await aget_all_operators()}
+    results = []
+    for tariff in tariffs:
+        text = await arender_tariff(tariff.id)
+        if text is None:
+            continue
+        price = f"{tariff.connection_price:,} ₽"
+        if tariff.monthly_fee:
+            price += f" · {tariff.monthly_fee:,} ₽/мес"
+        results.append(InlineQueryResultArticle(
+            id=str(tariff.id),
+            title=tariff.name,
+            description=f"{operator_names.get(tariff.operator_id, '')} · {price}",
+            input_message_content=InputTextMessageContent(message_text=text, parse_mode="HTML"),
+            reply_markup=tariff_link_kb(
+                f"https://t.me/{me.username}?start={TARIFF_DEEP_LINK_PREFIX}{tariff.id}"
+            ),
+        ))
+
+    await inline_query.answer(
+        results,
+        cache_time=_CACHE_TIME,
+        next_offset=str(offset + _RESULTS_PER_PAGE) if len(tariffs) == _RESULTS_PER_PAGE else "",
+        button=None if results else InlineQueryResultsButton(
+            text="📋 Открыть каталог тарифов", start_parameter="catalog"
+        ),
+    )
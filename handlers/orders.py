@@ -8,7 +8,8 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from keyboards.main_kb import confirm_order_kb, cancel_kb, main_menu_kb, order_mode_kb
-from data.tariffs import get_tariff_by_id, get_operator_by_id
+from data.tariffs import afind_region, aget_tariff_by_id, aget_operator_by_id
+from database import get_user_region, set_user_region
 
 router = Router()
 
@@ -28,7 +29,7 @@ class OrderStates(StatesGroup):
 async def start_order(callback: CallbackQuery, state: FSMContext):
     """Начало оформления заявки"""
     tariff_id = int(callback.data.split(":")[1])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
 
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
@@ -124,6 +125,12 @@ async def process_region_city(message: Message, state: FSMContext):
     await state.update_data(region_city=region_city)
     await state.set_state(OrderStates.waiting_passport_photo_1)
 
+    # Регион из заявки запоминаем для каталога, если пользователь его не выбирал
+    if await get_user_region(message.from_user.id) is None:
+        region = await afind_region(region_city)
+        if region:
+            await set_user_region(message.from_user.id, region)
+
     await message.answer(
         "📷 Отправьте фото паспорта: 1-я страница.",
         parse_mode="HTML"
@@ -164,13 +171,13 @@ async def process_passport_photo_2(message: Message, state: FSMContext):
 async def send_confirmation(message: Message, state: FSMContext):
     """Показать подтверждение заявки"""
     data = await state.get_data()
-    tariff = get_tariff_by_id(data["tariff_id"])
+    tariff = await aget_tariff_by_id(data["tariff_id"])
 
     if not tariff:
         await message.answer("Тариф не найден.")
         return
 
-    operator = get_operator_by_id(tariff.operator_id)
+    operator = await aget_operator_by_id(tariff.operator_id)
     mode = data.get("mode")
     mode_text = "Перенос номера" if mode == "transfer" else "Новый номер"
 
@@ -14,10 +14,10 @@ from keyboards.main_kb import (
     main_menu_kb,
 )
 from data.tariffs import (
-    get_tariff_by_id,
-    get_operator_by_id,
-    get_active_payment_methods,
-    get_payment_method_by_id,
+    aget_tariff_by_id,
+    aget_operator_by_id,
+    aget_active_payment_methods,
+    aget_payment_method_by_id,
 )
 from handlers.orders import OrderStates
 from config import load_config
@@ -116,7 +116,7 @@ async def _send_admin_notification(order: dict, bot: Bot, status_text: str) -> N
 async def create_payment(callback: CallbackQuery, state: FSMContext, bot: Bot):
     """Выбор способа оплаты (банка)"""
     tariff_id = int(callback.data.split(":")[1])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
 
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
@@ -132,7 +132,7 @@ async def create_payment(callback: CallbackQuery, state: FSMContext, bot: Bot):
         return
 
     # Получаем активные способы оплаты
-    methods = get_active_payment_methods()
+    methods = await aget_active_payment_methods()
     if not methods:
         await callback.message.edit_text(
             "⚠️ <b>Способы оплаты не настроены</b>\n\n"
@@ -142,7 +142,7 @@ async def create_payment(callback: CallbackQuery, state: FSMContext, bot: Bot):
         await callback.answer()
         return
 
-    operator = get_operator_by_id(tariff.operator_id)
+    operator = await aget_operator_by_id(tariff.operator_id)
     order_id = generate_order_id()
 
     # Сохраняем заказ в БД
@@ -186,12 +186,12 @@ async def select_payment_method(callback: CallbackQuery, state: FSMContext):
     method_id = int(parts[1])
     tariff_id = int(parts[2])
 
-    method = get_payment_method_by_id(method_id)
+    method = await aget_payment_method_by_id(method_id)
     if not method:
         await callback.answer("Способ оплаты не найден", show_alert=True)
         return
 
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
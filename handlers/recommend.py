@@ -0,0 +1,100 @@
+"""
+Подбор тарифа по бюджету
+"""
+from typing import Optional
+
+from aiogram import Router, F
+from aiogram.types import Message
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from keyboards.main_kb import MAIN_MENU_BUTTONS, search_results_kb
+from data.tariffs import aget_all_operators, arecommend_tariffs
+
+router = Router()
+
+_RESULTS_LIMIT = 10
+_NO_LIMIT_WORDS = {"-", "любая", "любой", "неважно", "нет"}
+
+
+class RecommendStates(StatesGroup):
+    """Состояния подбора тарифа"""
+    waiting_monthly_fee = State()
+    waiting_connection_price = State()
+
+
+def _parse_budget(text: str) -> Optional[int]:
+    """Сумма в рублях; None — без ограничения. ValueError, если не число"""
+    value = text.strip().lower().replace(" ", "").replace("₽", "").replace("руб", "")
+    if value in _NO_LIMIT_WORDS:
+        return None
+    if not value.isdigit():
+        raise ValueError(value)
+    return int(value)
+
+
+def _budget_text(value: Optional[int]) -> str:
+    return "без ограничения" if value is None else f"до {value:,} ₽"
+
+
+@router.message(F.text == "🎯 Подобрать тариф")
+async def start_recommend(message: Message, state: FSMContext):
+    """Начать подбор: спросить абонплату"""
+    await state.set_state(RecommendStates.waiting_monthly_fee)
+    await message.answer(
+        "<b>🎯 Подбор тарифа</b>\n\n"
+        "Сколько вы готовы платить в месяц? Напишите сумму в рублях, "
+        "например <code>500</code>, или <code>-</code>, если неважно.",
+        parse_mode="HTML"
+    )
+
+
+@router.message(RecommendStates.waiting_monthly_fee, F.text, ~F.text.in_(MAIN_MENU_BUTTONS))
+async def process_monthly_fee(message: Message, state: FSMContext):
+    """Абонплата получена, спросить стоимость подключения"""
+    try:
+        max_monthly_fee = _parse_budget(message.text)
+    except ValueError:
+        await message.answer("Напишите сумму числом, например <code>500</code>, или <code>-</code>.", parse_mode="HTML")
+        return
+
+    await state.update_data(max_monthly_fee=max_monthly_fee)
+    await state.set_state(RecommendStates.waiting_connection_price)
+    await message.answer(
+        "Сколько готовы заплатить за подключение? "
+        "Сумма в рублях или <code>-</code>, если неважно.",
+        parse_mode="HTML"
+    )
+
+
+@router.message(RecommendStates.waiting_connection_price, F.text, ~F.text.in_(MAIN_MENU_BUTTONS))
+async def process_connection_price(message: Message, state: FSMContext):
+    """Показать подходящие тарифы"""
+    try:
+        max_connection_price = _parse_budget(message.text)
+    except ValueError:
+        await message.answer("Напишите сумму числом, например <code>1000</code>, или <code>-</code>.", parse_mode="HTML")
+        return
+
+    data = await state.get_data()
+    await state.clear()
+    max_monthly_fee = data.get("max_monthly_fee")
+    tariffs = await arecommend_tariffs(max_monthly_fee, max_connection_price, limit=_RESULTS_LIMIT)
+    budget = (
+        f"Абонплата: {_budget_text(max_monthly_fee)}\n"
+        f"Подключение: {_budget_text(max_connection_price)}"
+    )
+    if not tariffs:
+        await message.answer(
+            f"<b>🎯 Подходящих тарифов нет</b>\n\n{budget}\n\n"
+            f"Попробуйте увеличить бюджет или посмотрите 📋 Тарифы.",
+            parse_mode="HTML"
+        )
+        return
+
+    operator_names = {operator.id: operator.name for operator in await aget_all_operators()}
+    await message.answer(
+        f"<b>🎯 Тарифы под ваш бюджет</b>\n\n{budget}\n\n<i>Выберите тариф:</i>",
+        reply_markup=search_results_kb(tariffs, operator_names),
+        parse_mode="HTML"
+    )
@@ -0,0 +1,58 @@
+"""
+Поиск тарифов по тексту
+"""
+import html
+
+from aiogram import Router, F
+from aiogram.types import Message
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+
+from keyboards.main_kb import MAIN_MENU_BUTTONS, search_results_kb
+from data.tariffs import aget_all_operators, asearch_tariffs
+
+router = Router()
+
+_RESULTS_LIMIT = 10
+_MAX_QUERY_LENGTH = 200
+
+
+class SearchStates(StatesGroup):
+    """Состояния поиска"""
+    waiting_query = State()
+
+
+@router.message(F.text == "🔎 Поиск")
+async def start_search(message: Message, state: FSMContext):
+    """Запросить текст для поиска"""
+    await state.set_state(SearchStates.waiting_query)
+    await message.answer(
+        "<b>🔎 Поиск тарифа</b>\n\n"
+        "Напишите, что ищете: название тарифа или, например, "
+        "<i>«безлимитный интернет»</i>.\n\n"
+        "<i>Нажмите любую кнопку меню, чтобы выйти из поиска.</i>",
+        parse_mode="HTML"
+    )
+
+
+@router.message(SearchStates.waiting_query, F.text, ~F.text.in_(MAIN_MENU_BUTTONS))
+async def search_tariffs(message: Message):
+    """Показать найденные тарифы; можно сразу уточнить запрос"""
+    query = message.text.strip()[:_MAX_QUERY_LENGTH]
+    tariffs = await asearch_tariffs(query, limit=_RESULTS_LIMIT)
+    if not tariffs:
+        await message.answer(
+            f"По запросу «{html.escape(query)}» ничего не найдено.\n"
+            f"Попробуйте другие слова или откройте 📋 Тарифы.",
+            parse_mode="HTML"
+        )
+        return
+
+    operator_names = {operator.id: operator.name for operator in await aget_all_operators()}
+    await message.answer(
+        f"<b>🔎 Найдено по запросу «{html.escape(query)}»:</b>\n\n"
+        f"<i>Выберите тариф или отправьте новый запрос.</i>",
+        reply_markup=search_results_kb(tariffs, operator_names),
+        parse_mode="HTML"
+    )
+
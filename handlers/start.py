@@ -3,11 +3,13 @@
 """
 from aiogram import Router, F, Bot
 from aiogram.types import Message, CallbackQuery
-from aiogram.filters import CommandStart
+from aiogram.filters import CommandStart, CommandObject
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from keyboards.main_kb import main_menu_kb
+from keyboards.main_kb import MAIN_MENU_BUTTONS, main_menu_kb, tariff_action_kb
+from data.tariffs import aget_tariff_by_id, arender_tariff
+from handlers.inline import TARIFF_DEEP_LINK_PREFIX
 from config import load_config
 
 router = Router()
@@ -33,6 +35,25 @@ WELCOME_MESSAGE = """
 """
 
 
+@router.message(CommandStart(deep_link=True, magic=F.args.startswith(TARIFF_DEEP_LINK_PREFIX)))
+async def cmd_start_tariff(message: Message, command: CommandObject, state: FSMContext):
+    """/start tariff_<id> — переход по карточке тарифа из inline-режима"""
+    await state.clear()
+    tariff_id = command.args[len(TARIFF_DEEP_LINK_PREFIX):]
+    tariff = await aget_tariff_by_id(int(tariff_id)) if tariff_id.isdigit() else None
+    text = await arender_tariff(tariff.id) if tariff and tariff.is_public else None
+    if text is None:
+        await cmd_start(message, state)
+        return
+
+    await message.answer(WELCOME_MESSAGE, reply_markup=main_menu_kb(), parse_mode="HTML")
+    await message.answer(
+        text,
+        reply_markup=tariff_action_kb(tariff.id, tariff.operator_id),
+        parse_mode="HTML"
+    )
+
+
 @router.message(CommandStart())
 async def cmd_start(message: Message, state: FSMContext):
     """Обработка команды /start"""
@@ -45,8 +66,9 @@ async def cmd_start(message: Message, state: FSMContext):
 
 
 @router.message(F.text == "ℹ️ О нас")
-async def about_us(message: Message):
-    """Информация о компании/услугах"""
+async def about_us(message: Message, state: FSMContext):
+    """Информация о компании/услугах (кнопка меню завершает поиск, подбор и т.п.)"""
+    await state.clear()
     about_text = """
 <b>ℹ️ О нас</b>
 
@@ -86,8 +108,7 @@ async def forward_message_to_admin(message: Message, state: FSMContext, bot: Bot
         return
     
     # Проверяем, не нажал ли пользователь кнопку меню
-    menu_buttons = ["📋 Тарифы", "ℹ️ О нас", "❓ FAQ", "💬 Связаться"]
-    if message.text in menu_buttons:
+    if message.text in MAIN_MENU_BUTTONS:
         await state.clear()
         return  # Пусть другой обработчик обработает
     
@@ -3,23 +3,40 @@
 """
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
-
-from keyboards.main_kb import operators_kb, tariffs_kb, tariff_action_kb, back_to_operators_kb
+from aiogram.fsm.context import FSMContext
+
+from keyboards.main_kb import (
+    operators_kb,
+    region_callback_key,
+    regions_kb,
+    tariffs_kb,
+    tariff_action_kb,
+    back_to_operators_kb,
+)
 from data.tariffs import (
-    get_all_operators,
-    get_operator_by_id,
-    get_tariffs_by_operator,
-    get_tariff_by_id,
-    format_tariff_info,
+    aget_all_operators,
+    aget_operator_by_id,
+    aget_regions,
+    aget_tariffs_page,
+    aget_tariff_by_id,
+    arender_tariff,
 )
+from database import get_user_region, set_user_region
 
 router = Router()
 
 
+def _operators_text(region) -> str:
+    if region:
+        return f"<b>📡 Выберите оператора</b>\n\n📍 Тарифы для региона: <b>{region}</b>"
+    return "<b>📡 Выберите оператора</b>"
+
+
 @router.message(F.text == "📋 Тарифы")
-async def show_operators(message: Message):
-    """Показать список операторов"""
-    operators = get_all_operators()
+async def show_operators(message: Message, state: FSMContext):
+    """Показать список операторов (кнопка меню завершает поиск, подбор и т.п.)"""
+    await state.clear()
+    operators = await aget_all_operators()
     if not operators:
         await message.answer(
             "Пока нет доступных операторов.",
@@ -27,9 +44,10 @@ async def show_operators(message: Message):
         )
         return
 
+    region = await get_user_region(message.from_user.id)
     await message.answer(
-        "<b>📡 Выберите оператора</b>",
-        reply_markup=operators_kb(),
+        _operators_text(region),
+        reply_markup=await operators_kb(region),
         parse_mode="HTML"
     )
 
@@ -37,28 +55,71 @@ async def show_operators(message: Message):
 @router.callback_query(F.data == "back_to_operators")
 async def back_to_operators(callback: CallbackQuery):
     """Вернуться к списку операторов"""
+    region = await get_user_region(callback.from_user.id)
+    await callback.message.edit_text(
+        _operators_text(region),
+        reply_markup=await operators_kb(region),
+        parse_mode="HTML"
+    )
+    await callback.answer()
+
+
+@router.callback_query(F.data.startswith("regions:"))
+async def choose_region(callback: CallbackQuery):
+    """Список регионов (regions:{страница})"""
+    page = int(callback.data.split(":")[1])
     await callback.message.edit_text(
-        "<b>📡 Выберите оператора</b>",
-        reply_markup=operators_kb(),
+        "<b>📍 Выберите ваш регион</b>\n\n"
+        "Покажем только тарифы, которые в нём доступны.",
+        reply_markup=await regions_kb(page),
         parse_mode="HTML"
     )
     await callback.answer()
 
 
+@router.callback_query(F.data.startswith("region_set:"))
+async def set_region(callback: CallbackQuery):
+    """Запомнить регион пользователя (region_set:{ключ региона} или region_set:all)"""
+    value = callback.data.split(":")[1]
+    region = None
+    if value != "all":
+        region = next(
+            (name for name in await aget_regions() if region_callback_key(name) == value),
+            None,
+        )
+        if region is None:
+            # Регион удалён или переименован после отправки клавиатуры
+            await callback.answer("Список регионов изменился, выберите ещё раз", show_alert=True)
+            return
+
+    await set_user_region(callback.from_user.id, region)
+    await callback.message.edit_text(
+        _operators_text(region),
+        reply_markup=await operators_kb(region),
+        parse_mode="HTML"
+    )
+    await callback.answer(f"Регион: {region}" if region else "Показываем тарифы всех регионов")
+
+
 @router.callback_query(F.data.startswith("operator:"))
 async def show_operator_tariffs(callback: CallbackQuery):
     """Показать тарифы выбранного оператора"""
-    operator_id = int(callback.data.split(":")[1])
-    operator = get_operator_by_id(operator_id)
+    # operator:{id}[:{страница}]
+    parts = callback.data.split(":")
+    operator_id = int(parts[1])
+    page = int(parts[2]) if len(parts) > 2 else 0
+    operator = await aget_operator_by_id(operator_id)
 
     if not operator:
         await callback.answer("Оператор не найден", show_alert=True)
         return
 
-    tariffs = get_tariffs_by_operator(operator_id, include_hidden=False)
+    region = await get_user_region(callback.from_user.id)
+    tariffs, page, _ = await aget_tariffs_page(operator_id, page, region=region)
     if not tariffs:
+        where = f" в регионе <b>{region}</b>" if region else ""
         await callback.message.edit_text(
-            f"У оператора <b>{operator.name}</b> пока нет тарифов.",
+            f"У оператора <b>{operator.name}</b> пока нет тарифов{where}.",
             reply_markup=back_to_operators_kb(),
             parse_mode="HTML"
         )
@@ -67,25 +128,32 @@ async def show_operator_tariffs(callback: CallbackQuery):
 
     await callback.message.edit_text(
         f"<b>📦 Тарифы оператора {operator.name}</b>\n\nВыберите тариф:",
-        reply_markup=tariffs_kb(operator_id),
+        reply_markup=await tariffs_kb(operator_id, page, region),
         parse_mode="HTML"
     )
     await callback.answer()
 
 
+@router.callback_query(F.data == "noop")
+async def noop(callback: CallbackQuery):
+    """Кнопка без действия (номер страницы)"""
+    await callback.answer()
+
+
 @router.callback_query(F.data.startswith("tariff:"))
 async def show_tariff_details(callback: CallbackQuery):
     """Показать детали тарифа"""
     tariff_id = int(callback.data.split(":")[1])
-    tariff = get_tariff_by_id(tariff_id)
+    tariff = await aget_tariff_by_id(tariff_id)
 
     if not tariff:
         await callback.answer("Тариф не найден", show_alert=True)
         return
 
-    operator = get_operator_by_id(tariff.operator_id)
-    operator_name = operator.name if operator else None
-    tariff_info = format_tariff_info(tariff, operator_name)
+    tariff_info = await arender_tariff(tariff_id)
+    if tariff_info is None:
+        await callback.answer("Тариф не найден", show_alert=True)
+        return
 
     await callback.message.edit_text(
         tariff_info,
@@ -99,15 +167,16 @@ async def show_tariff_details(callback: CallbackQuery):
 async def back_to_operator(callback: CallbackQuery):
     """Вернуться к тарифам оператора"""
     operator_id = int(callback.data.split(":")[1])
-    operator = get_operator_by_id(operator_id)
+    operator = await aget_operator_by_id(operator_id)
 
     if not operator:
         await callback.answer("Оператор не найден", show_alert=True)
         return
 
+    region = await get_user_region(callback.from_user.id)
     await callback.message.edit_text(
         f"<b>📦 Тарифы оператора {operator.name}</b>\n\nВыберите тариф:",
-        reply_markup=tariffs_kb(operator_id),
+        reply_markup=await tariffs_kb(operator_id, region=region),
         parse_mode="HTML"
     )
     await callback.answer()
@@ -5,6 +5,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from data.tariffs import Operator, Tariff, PaymentMethod
+from keyboards.main_kb import page_nav_buttons
 
 
 def admin_main_kb() -> InlineKeyboardMarkup:
@@ -19,6 +20,9 @@ def admin_main_kb() -> InlineKeyboardMarkup:
     builder.row(
         InlineKeyboardButton(text="💳 Способы оплаты", callback_data="admin:payment_methods")
     )
+    builder.row(
+        InlineKeyboardButton(text="📥 Импорт / экспорт", callback_data="admin:catalog_io")
+    )
     builder.row(
         InlineKeyboardButton(text="⬅️ Главное меню", callback_data="main_menu")
     )
@@ -78,8 +82,13 @@ def admin_tariffs_operators_kb(operators: list[Operator]) -> InlineKeyboardMarku
     return builder.as_markup()
 
 
-def admin_tariffs_kb(operator_id: int, tariffs: list[Tariff]) -> InlineKeyboardMarkup:
-    """Список тарифов оператора"""
+def admin_tariffs_kb(
+    operator_id: int,
+    tariffs: list[Tariff],
+    page: int = 0,
+    pages: int = 1,
+) -> InlineKeyboardMarkup:
+    """Список тарифов оператора (одна страница)"""
     builder = InlineKeyboardBuilder()
     for tariff in tariffs:
         status = "👁️" if tariff.is_public else "🙈"
@@ -89,12 +98,21 @@ def admin_tariffs_kb(operator_id: int, tariffs: list[Tariff]) -> InlineKeyboardM
                 callback_data=f"admin:tariff:{tariff.id}"
             )
         )
+    nav = page_nav_buttons(f"admin:tariffs_operator:{operator_id}", page, pages)
+    if nav:
+        builder.row(*nav)
     builder.row(
         InlineKeyboardButton(
             text="➕ Добавить тариф",
             callback_data=f"admin:tariff_add:{operator_id}"
         )
     )
+    builder.row(
+        InlineKeyboardButton(
+            text="💱 Изменить цены",
+            callback_data=f"admin:price_rule:{operator_id}"
+        )
+    )
     builder.row(
         InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:tariffs")
     )
@@ -163,6 +181,12 @@ def admin_tariff_edit_kb(tariff_id: int) -> InlineKeyboardMarkup:
             callback_data=f"admin:tariff_edit_price:{tariff_id}"
         )
     )
+    builder.row(
+        InlineKeyboardButton(
+            text="📍 Регионы",
+            callback_data=f"admin:tariff_edit_regions:{tariff_id}"
+        )
+    )
     builder.row(
         InlineKeyboardButton(
             text="⬅️ Назад",
@@ -172,6 +196,24 @@ def admin_tariff_edit_kb(tariff_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def admin_price_rule_confirm_kb(operator_id: int) -> InlineKeyboardMarkup:
+    """Подтверждение массового изменения цен"""
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(
+            text="✅ Применить",
+            callback_data="admin:price_rule_apply"
+        )
+    )
+    builder.row(
+        InlineKeyboardButton(
+            text="❌ Отмена",
+            callback_data=f"admin:tariffs_operator:{operator_id}"
+        )
+    )
+    return builder.as_markup()
+
+
 def admin_tariff_visibility_kb() -> InlineKeyboardMarkup:
     """Выбор видимости тарифа"""
     builder = InlineKeyboardBuilder()
@@ -190,6 +232,24 @@ def admin_tariff_visibility_kb() -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def admin_catalog_io_kb() -> InlineKeyboardMarkup:
+    """Импорт и экспорт каталога"""
+    builder = InlineKeyboardBuilder()
+    builder.row(
+        InlineKeyboardButton(text="📤 Экспорт CSV", callback_data="admin:catalog_export:csv")
+    )
+    builder.row(
+        InlineKeyboardButton(text="📤 Экспорт JSON", callback_data="admin:catalog_export:json")
+    )
+    builder.row(
+        InlineKeyboardButton(text="📥 Импорт из файла", callback_data="admin:catalog_import")
+    )
+    builder.row(
+        InlineKeyboardButton(text="⬅️ Назад", callback_data="admin:back_main")
+    )
+    return builder.as_markup()
+
+
 # ============== Payment Methods Keyboards ==============
 
 def admin_payment_methods_kb(methods: list[PaymentMethod]) -> InlineKeyboardMarkup:
@@ -1,30 +1,141 @@
 """
 Клавиатуры бота
 """
+import hashlib
+from functools import lru_cache
+from typing import Dict, Hashable, List, Optional, Tuple
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
 
-from data.tariffs import get_all_operators, get_tariffs_by_operator, PaymentMethod
+from data.tariffs import (
+    aget_all_operators,
+    aget_catalog_version,
+    aget_regions,
+    aget_tariffs_page,
+    region_key,
+    PaymentMethod,
+    Tariff,
+)
+
+
+# Клавиатуры каталога строятся один раз на версию каталога;
+# при любом изменении каталога кэш сбрасывается целиком.
+_catalog_kb_cache: Dict[Hashable, InlineKeyboardMarkup] = {}
+_catalog_kb_version = -1
+
+
+async def _cached_catalog_kb(key: Hashable, build) -> InlineKeyboardMarkup:
+    """Клавиатура из кэша; key должен содержать только проверенные значения
+    (например, номер страницы в допустимом диапазоне), иначе кэш растёт без предела"""
+    global _catalog_kb_version
+    version = await aget_catalog_version()
+    if version != _catalog_kb_version:
+        _catalog_kb_cache.clear()
+        _catalog_kb_version = version
+
+    markup = _catalog_kb_cache.get(key)
+    if markup is None:
+        markup = await build()
+        # Пока строили (чтение могло ждать записи в пуле потоков), каталог
+        # мог измениться: такую клавиатуру отдаём, но не кэшируем
+        if version == _catalog_kb_version and version == await aget_catalog_version():
+            _catalog_kb_cache[key] = markup
+    return markup
+
 
+# Кнопки главного меню; текст с ними не считается вводом в диалогах
+MAIN_MENU_BUTTONS = ("📋 Тарифы", "🔎 Поиск", "🎯 Подобрать тариф", "ℹ️ О нас", "❓ FAQ", "💬 Связаться")
 
+
+@lru_cache(maxsize=None)
 def main_menu_kb() -> ReplyKeyboardMarkup:
     """Главное меню"""
     builder = ReplyKeyboardBuilder()
     builder.row(
         KeyboardButton(text="📋 Тарифы"),
-        KeyboardButton(text="ℹ️ О нас"),
+        KeyboardButton(text="🔎 Поиск"),
+        KeyboardButton(text="🎯 Подобрать тариф"),
     )
     builder.row(
+        KeyboardButton(text="ℹ️ О нас"),
         KeyboardButton(text="❓ FAQ"),
         KeyboardButton(text="💬 Связаться"),
     )
     return builder.as_markup(resize_keyboard=True)
 
 
-def operators_kb() -> InlineKeyboardMarkup:
-    """Клавиатура выбора оператора"""
+REGIONS_PAGE_SIZE = 20
+
+
+async def operators_kb(region: Optional[str] = None) -> InlineKeyboardMarkup:
+    """Клавиатура выбора оператора (с кнопкой выбора региона)"""
+    return await _cached_catalog_kb(("operators", _region_cache_key(region)), lambda: _build_operators_kb(region))
+
+
+async def tariffs_kb(operator_id: int, page: int = 0, region: Optional[str] = None) -> InlineKeyboardMarkup:
+    """Клавиатура выбора тарифа (одна страница, только тарифы региона)"""
+    # Номер страницы приходит из callback_data — в ключ кэша только допустимый
+    _, page, _ = await aget_tariffs_page(operator_id, page, region=region)
+    return await _cached_catalog_kb(
+        ("tariffs", operator_id, page, _region_cache_key(region)),
+        lambda: _build_tariffs_kb(operator_id, page, region),
+    )
+
+
+def _region_cache_key(region: Optional[str]) -> Optional[str]:
+    # Написания одного региона («Москва», «москва ») — одна запись кэша
+    return region_key(region) if region else None
+
+
+def region_callback_key(region: str) -> str:
+    """Стабильный ключ региона для callback_data (полное название не влезает в 64 байта)"""
+    return hashlib.blake2s(region_key(region).encode("utf-8"), digest_size=6).hexdigest()
+
+
+def _regions_page(page: int, regions: List[str]) -> Tuple[int, int]:
+    pages = max((len(regions) + REGIONS_PAGE_SIZE - 1) // REGIONS_PAGE_SIZE, 1)
+    return min(max(page, 0), pages - 1), pages
+
+
+async def regions_kb(page: int = 0) -> InlineKeyboardMarkup:
+    """Клавиатура выбора региона: callback_data = region_set:{region_callback_key(регион)}"""
+    page, _ = _regions_page(page, await aget_regions())
+    return await _cached_catalog_kb(("regions", page), lambda: _build_regions_kb(page))
+
+
+def search_results_kb(tariffs: List[Tariff], operator_names: Dict[int, str]) -> InlineKeyboardMarkup:
+    """Найденные тарифы: по кнопке на тариф"""
     builder = InlineKeyboardBuilder()
-    operators = get_all_operators()
+    for tariff in tariffs:
+        operator = operator_names.get(tariff.operator_id, "")
+        builder.row(InlineKeyboardButton(
+            text=f"{tariff.name} — {operator} · {tariff.connection_price:,} ₽",
+            callback_data=f"tariff:{tariff.id}",
+        ))
+    return builder.as_markup()
+
+
+def page_nav_buttons(callback_prefix: str, page: int, pages: int) -> list[InlineKeyboardButton]:
+    """Кнопки листания страниц: callback_data = f"{callback_prefix}:{номер}" """
+    if pages <= 1:
+        return []
+    buttons = []
+    if page > 0:
+        buttons.append(
+            InlineKeyboardButton(text="◀️", callback_data=f"{callback_prefix}:{page - 1}")
+        )
+    buttons.append(InlineKeyboardButton(text=f"{page + 1}/{pages}", callback_data="noop"))
+    if page < pages - 1:
+        buttons.append(
+            InlineKeyboardButton(text="▶️", callback_data=f"{callback_prefix}:{page + 1}")
+        )
+    return buttons
+
+
+async def _build_operators_kb(region: Optional[str] = None) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    operators = await aget_all_operators()
 
     for operator in operators:
         builder.row(
@@ -34,13 +145,46 @@ def operators_kb() -> InlineKeyboardMarkup:
             )
         )
 
+    if region or await aget_regions():
+        builder.row(
+            InlineKeyboardButton(
+                text=f"📍 Регион: {region}" if region else "📍 Выбрать регион",
+                callback_data="regions:0"
+            )
+        )
+
+    return builder.as_markup()
+
+
+async def _build_regions_kb(page: int) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    regions = await aget_regions()
+    page, pages = _regions_page(page, regions)
+    start = page * REGIONS_PAGE_SIZE
+
+    buttons = [
+        InlineKeyboardButton(text=name, callback_data=f"region_set:{region_callback_key(name)}")
+        for name in regions[start:start + REGIONS_PAGE_SIZE]
+    ]
+    for row_start in range(0, len(buttons), 2):
+        builder.row(*buttons[row_start:row_start + 2])
+
+    nav = page_nav_buttons("regions", page, pages)
+    if nav:
+        builder.row(*nav)
+    builder.row(InlineKeyboardButton(text="🌐 Все регионы", callback_data="region_set:all"))
+    builder.row(
+        InlineKeyboardButton(
+            text="⬅️ К операторам",
+            callback_data="back_to_operators"
+        )
+    )
     return builder.as_markup()
 
 
-def tariffs_kb(operator_id: int) -> InlineKeyboardMarkup:
-    """Клавиатура выбора тарифа"""
+async def _build_tariffs_kb(operator_id: int, page: int, region: Optional[str] = None) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
-    tariffs = get_tariffs_by_operator(operator_id, include_hidden=False)
+    tariffs, page, pages = await aget_tariffs_page(operator_id, page, region=region)
 
     for tariff in tariffs:
         builder.row(
@@ -50,6 +194,9 @@ def tariffs_kb(operator_id: int) -> InlineKeyboardMarkup:
             )
         )
 
+    nav = page_nav_buttons(f"operator:{operator_id}", page, pages)
+    if nav:
+        builder.row(*nav)
     builder.row(
         InlineKeyboardButton(
             text="⬅️ К операторам",
@@ -78,6 +225,13 @@ def tariff_action_kb(tariff_id: int, operator_id: int) -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
+def tariff_link_kb(url: str) -> InlineKeyboardMarkup:
+    """Кнопка перехода к тарифу в боте (для карточек из inline-режима)"""
+    builder = InlineKeyboardBuilder()
+    builder.row(InlineKeyboardButton(text="✅ Оформить в боте", url=url))
+    return builder.as_markup()
+
+
 def order_mode_kb(tariff_id: int) -> InlineKeyboardMarkup:
     """Клавиатура выбора типа заявки"""
     builder = InlineKeyboardBuilder()
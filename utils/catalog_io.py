@@ -0,0 +1,174 @@
+"""
+Импорт и экспорт каталога тарифов в CSV/JSON
+"""
+import csv
+import io
+import json
+from typing import Dict, List
+
+from data.tariffs import Operator, Tariff
+
+
+CSV_COLUMNS = [
+    "operator", "name", "description", "monthly_fee", "connection_price", "is_public", "regions",
+]
+# Регионы в одной ячейке CSV
+REGIONS_SEPARATOR = ";"
+
+_TRUE_VALUES = {"1", "true", "yes", "y", "да", "+"}
+_FALSE_VALUES = {"0", "false", "no", "n", "нет", "-"}
+
+
+class CatalogImportError(ValueError):
+    """Ошибки разбора файла каталога (по строкам)"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def _parse_int(value, field_name: str, allow_empty: bool) -> object:
+    if value is None or str(value).strip() == "":
+        if allow_empty:
+            return None
+        raise ValueError(f"не заполнено поле {field_name}")
+    text = str(value).strip().replace(" ", "")
+    if not text.isdigit():
+        raise ValueError(f"{field_name} должно быть целым числом, получено «{value}»")
+    return int(text)
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE_VALUES:
+        return True
+    if text in _FALSE_VALUES:
+        return False
+    raise ValueError(f"is_public должно быть 1/0 или да/нет, получено «{value}»")
+
+
+def _parse_regions(value) -> object:
+    """Список регионов; None — колонки нет (регионы тарифа не меняются)"""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    return [item for item in str(value).split(REGIONS_SEPARATOR) if item.strip()]
+
+
+def _read_rows(filename: str, content: bytes) -> List[dict]:
+    text = content.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        data = json.loads(text)
+        if isinstance(data, dict):
+            data = data.get("tariffs", [])
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise CatalogImportError(["JSON должен быть списком тарифов или {\"tariffs\": [...]}"])
+        return data
+
+    sample = text[:4096]
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    return list(csv.DictReader(io.StringIO(text), dialect=dialect))
+
+
+def parse_tariffs_document(
+    filename: str,
+    content: bytes,
+    operators: List[Operator],
+) -> List[dict]:
+    """Разобрать и проверить все строки файла.
+
+    Оператор указывается названием (operator) или ID (operator_id),
+    регионы — через «;» (пусто — все регионы). Колонок, которых нет в файле
+    (и пустого is_public), нет и в строке: у существующего тарифа эти поля
+    не меняются.
+    Возвращает строки для bulk_upsert_tariffs или бросает CatalogImportError
+    со списком ошибок по всем строкам.
+    """
+    operators_by_name = {operator.name.lower(): operator.id for operator in operators}
+    operator_ids = {operator.id for operator in operators}
+
+    rows = []
+    errors = []
+    for line_number, raw in enumerate(_read_rows(filename, content), start=2):
+        try:
+            if raw.get("operator_id") not in (None, ""):
+                operator_id = _parse_int(raw["operator_id"], "operator_id", allow_empty=False)
+                if operator_id not in operator_ids:
+                    raise ValueError(f"оператор с ID {operator_id} не найден")
+            else:
+                operator_name = str(raw.get("operator") or "").strip()
+                if not operator_name:
+                    raise ValueError("не указан оператор")
+                operator_id = operators_by_name.get(operator_name.lower())
+                if operator_id is None:
+                    raise ValueError(f"оператор «{operator_name}» не найден")
+
+            name = str(raw.get("name") or "").strip()
+            if not name:
+                raise ValueError("не заполнено поле name")
+
+            row = {"operator_id": operator_id, "name": name}
+            if "description" in raw:
+                row["description"] = str(raw["description"] or "").strip()
+            if "monthly_fee" in raw:
+                monthly_fee = _parse_int(raw["monthly_fee"], "monthly_fee", allow_empty=True)
+                row["monthly_fee"] = monthly_fee or None
+            if "connection_price" in raw:
+                row["connection_price"] = _parse_int(
+                    raw["connection_price"], "connection_price", allow_empty=False
+                )
+            is_public = raw.get("is_public")
+            if is_public is not None and str(is_public).strip() != "":
+                row["is_public"] = _parse_bool(is_public)
+            if "regions" in raw:
+                row["regions"] = _parse_regions(raw["regions"])
+            rows.append(row)
+        except ValueError as exc:
+            errors.append(f"Строка {line_number}: {exc}")
+
+    if errors:
+        raise CatalogImportError(errors)
+    if not rows:
+        raise CatalogImportError(["В файле нет тарифов"])
+    return rows
+
+
+def _export_rows(operators: List[Operator], tariffs: Dict[int, List[Tariff]]) -> List[dict]:
+    rows = []
+    for operator in operators:
+        for tariff in tariffs.get(operator.id, []):
+            rows.append({
+                "operator": operator.name,
+                "name": tariff.name,
+                "description": tariff.description,
+                "monthly_fee": tariff.monthly_fee,
+                "connection_price": tariff.connection_price,
+                "is_public": tariff.is_public,
+                "regions": list(tariff.regions),
+            })
+    return rows
+
+
+def export_tariffs_csv(operators: List[Operator], tariffs: Dict[int, List[Tariff]]) -> bytes:
+    """Каталог в CSV (UTF-8 с BOM, открывается в Excel)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    for row in _export_rows(operators, tariffs):
+        row["monthly_fee"] = row["monthly_fee"] or ""
+        row["is_public"] = 1 if row["is_public"] else 0
+        row["regions"] = f"{REGIONS_SEPARATOR} ".join(row["regions"])
+        writer.writerow(row)
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def export_tariffs_json(operators: List[Operator], tariffs: Dict[int, List[Tariff]]) -> bytes:
+    """Каталог в JSON"""
+    payload = {"tariffs": _export_rows(operators, tariffs)}
+    return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
@@ -0,0 +1,140 @@
+"""
+Правила массового изменения цен тарифов.
+
+Формат правила: <поле> <изменение> [публичные|скрытые|все]
+    подключение +10%
+    абонплата -50 скрытые
+    абонплата =500 публичные
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from data.tariffs import Tariff
+
+
+_FIELDS = {
+    "подключение": "connection_price",
+    "стоимость": "connection_price",
+    "connection": "connection_price",
+    "абонплата": "monthly_fee",
+    "абонентская": "monthly_fee",
+    "monthly": "monthly_fee",
+}
+
+_SCOPES = {
+    "все": "all",
+    "all": "all",
+    "публичные": "public",
+    "public": "public",
+    "скрытые": "hidden",
+    "hidden": "hidden",
+}
+
+_CHANGE_RE = re.compile(r"^([+\-=])\s*(\d+(?:[.,]\d+)?)\s*(%?)$")
+
+FIELD_TITLES = {
+    "connection_price": "Стоимость подключения",
+    "monthly_fee": "Абонплата",
+}
+
+SCOPE_TITLES = {
+    "all": "все тарифы",
+    "public": "публичные тарифы",
+    "hidden": "скрытые тарифы",
+}
+
+
+@dataclass(frozen=True)
+class PriceRule:
+    """Правило изменения цены"""
+    field: str          # connection_price / monthly_fee
+    operation: str      # "+", "-" или "="
+    value: float
+    is_percent: bool
+    scope: str = "all"  # all / public / hidden
+
+    def describe(self) -> str:
+        """Описание правила для предпросмотра"""
+        value = f"{self.value:g}{'%' if self.is_percent else ' ₽'}"
+        action = "установить" if self.operation == "=" else self.operation
+        return f"{FIELD_TITLES[self.field]}: {action} {value} ({SCOPE_TITLES[self.scope]})"
+
+
+@dataclass(frozen=True)
+class PriceChange:
+    """Изменение цены одного тарифа"""
+    tariff: Tariff
+    old: Optional[int]
+    new: Optional[int]
+
+
+def parse_price_rule(text: str) -> PriceRule:
+    """Разобрать правило; ValueError с пояснением при ошибке"""
+    words = text.strip().lower().split()
+    if len(words) < 2:
+        raise ValueError("укажите поле и изменение, например «подключение +10%»")
+
+    field_name = _FIELDS.get(words[0])
+    if field_name is None:
+        raise ValueError("поле должно быть «подключение» или «абонплата»")
+
+    scope = "all"
+    change_words = words[1:]
+    if change_words[-1] in _SCOPES:
+        scope = _SCOPES[change_words[-1]]
+        change_words = change_words[:-1]
+
+    match = _CHANGE_RE.match("".join(change_words))
+    if not match:
+        raise ValueError("изменение должно выглядеть как +10%, -200 или =500")
+
+    operation, number, percent = match.groups()
+    is_percent = bool(percent)
+    if operation == "=" and is_percent:
+        raise ValueError("проценты можно только прибавлять или вычитать")
+
+    return PriceRule(
+        field=field_name,
+        operation=operation,
+        value=float(number.replace(",", ".")),
+        is_percent=is_percent,
+        scope=scope,
+    )
+
+
+def _new_value(rule: PriceRule, old: Optional[int]) -> Optional[int]:
+    if rule.operation == "=":
+        new = int(round(rule.value))
+    elif old is None:
+        # Абонплата не задана — прибавлять не к чему
+        return old
+    else:
+        delta = old * rule.value / 100 if rule.is_percent else rule.value
+        new = int(round(old + delta if rule.operation == "+" else old - delta))
+
+    new = max(new, 0)
+    if rule.field == "monthly_fee" and new == 0:
+        return None
+    return new
+
+
+def compute_price_changes(tariffs: List[Tariff], rule: PriceRule) -> List[PriceChange]:
+    """Новые цены для подходящих тарифов (за один проход)"""
+    changes = []
+    for tariff in tariffs:
+        if rule.scope == "public" and not tariff.is_public:
+            continue
+        if rule.scope == "hidden" and tariff.is_public:
+            continue
+
+        old = getattr(tariff, rule.field)
+        new = _new_value(rule, old)
+        if new != old:
+            changes.append(PriceChange(tariff=tariff, old=old, new=new))
+    return changes
+
+
+def changes_to_fields(changes: List[PriceChange], rule: PriceRule) -> Dict[int, dict]:
+    """Изменения в формате bulk_update_tariffs"""
+    return {change.tariff.id: {rule.field: change.new} for change in changes}